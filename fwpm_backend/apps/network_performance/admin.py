@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import NetworkPerformance
+from .models import NetworkPerformance, ThresholdProfile
 
 # Register your models here.
 @admin.register(NetworkPerformance)
@@ -58,3 +58,11 @@ class NetworkPerformanceAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         """Optimize queryset for admin list view"""
         return super().get_queryset(request).select_related()
+
+@admin.register(ThresholdProfile)
+class ThresholdProfileAdmin(admin.ModelAdmin):
+    """Alert thresholds can be changed here without a deploy"""
+    list_display = ('name', 'technology', 'site_class', 'is_active', 'updated_at')
+    list_filter = ('technology', 'is_active')
+    search_fields = ('name', 'site_class')
+    readonly_fields = ('created_at', 'updated_at')
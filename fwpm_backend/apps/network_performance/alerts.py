@@ -0,0 +1,316 @@
+"""
+Threshold evaluation for network performance alerts
+
+Thresholds come from ThresholdProfile rows per technology and site
+class. ``get_evaluator`` compiles them into a ``ThresholdEvaluator``, a
+few NumPy comparisons over column arrays, which is cached per process and
+rebuilt when a profile changes. During ingest ``AlertScan`` runs it over
+each stored batch and keeps the Alert table up to date, so reading alerts
+is an indexed lookup instead of a scan of the metrics table. After a
+profile change ``evaluate_ingested`` re-runs the scan over recent stored
+metrics (see tasks.reevaluate_alerts).
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import caching
+from .models import Alert, NetworkPerformance, ThresholdProfile
+
+SEVERITIES = ('critical', 'warning')
+
+# Per metric: warning and critical levels, and whether values must stay
+# above them ('min') or below them ('max'). Used for LTE until a default
+# ThresholdProfile exists.
+DEFAULT_THRESHOLDS = {
+    'cell_availability': {'warning': 98.0, 'critical': 95.0, 'type': 'min'},
+    'dl_cell_throughput': {'warning': 50.0, 'critical': 25.0, 'type': 'min'},
+    'ul_cell_throughput': {'warning': 10.0, 'critical': 5.0, 'type': 'min'},
+    'dl_latency': {'warning': 50.0, 'critical': 100.0, 'type': 'max'},
+    'dl_prb_usage': {'warning': 80.0, 'critical': 90.0, 'type': 'max'},
+    'ul_prb_usage': {'warning': 80.0, 'critical': 90.0, 'type': 'max'},
+}
+
+KEY_FIELDS = ('metrics_date_local', 'site', 'cell_id')
+ALERT_FIELDS = KEY_FIELDS + ('metric', 'value', 'threshold', 'severity')
+
+
+class ThresholdEvaluator:
+    """
+    Threshold profiles of one technology compiled into arrays
+
+    Levels are stored per profile and metric, negated for 'min' metrics so
+    every check is ``direction * value > level``. ``evaluate`` picks each
+    row's profile from its site and compares whole columns at once.
+    """
+
+    def __init__(self, default_thresholds, class_profiles=()):
+        """
+        Args:
+            default_thresholds (dict): Thresholds for sites without a class
+            class_profiles (iterable): (sites, thresholds) per site class;
+                class thresholds override the defaults metric by metric
+        """
+        profiles = [dict(default_thresholds)]
+        self.site_profiles = {}
+        for sites, thresholds in class_profiles:
+            profiles.append({**default_thresholds, **thresholds})
+            for site in sites:
+                # A site listed in several classes keeps the first one
+                self.site_profiles.setdefault(site, len(profiles) - 1)
+
+        self.default_thresholds = profiles[0]
+        self.metrics = tuple(sorted({metric for profile in profiles for metric in profile}))
+        shape = (len(profiles), len(self.metrics))
+        self.direction = np.zeros(shape)
+        self.warning = np.full(shape, np.nan)
+        self.critical = np.full(shape, np.nan)
+        for row, profile in enumerate(profiles):
+            for column, metric in enumerate(self.metrics):
+                threshold = profile.get(metric)
+                if threshold is None:
+                    continue
+                self.direction[row, column] = -1.0 if threshold['type'] == 'min' else 1.0
+                self.warning[row, column] = float(threshold['warning'])
+                self.critical[row, column] = float(threshold['critical'])
+        self.warning_level = self.direction * self.warning
+        self.critical_level = self.direction * self.critical
+
+    def evaluate(self, df):
+        """
+        Breaches in a DataFrame of metrics rows
+
+        Returns:
+            DataFrame: One row per breaching value with ALERT_FIELDS
+        """
+        if df.empty or not self.metrics:
+            return pd.DataFrame(columns=ALERT_FIELDS)
+        values = np.column_stack([
+            pd.to_numeric(df[metric], errors='coerce').to_numpy(dtype=float)
+            if metric in df else np.full(len(df), np.nan)
+            for metric in self.metrics
+        ])
+        if len(self.direction) > 1:
+            profile = df['site'].map(self.site_profiles).fillna(0).to_numpy(dtype=np.intp)
+        else:
+            profile = np.zeros(len(df), dtype=np.intp)
+        # One profile broadcasts its levels instead of gathering a row per value
+        pick = (lambda levels: levels[profile]) if len(self.direction) > 1 else (lambda levels: levels[0])
+
+        signed = values * pick(self.direction)
+        warning = signed > pick(self.warning_level)  # NaN never compares greater
+        critical = signed > pick(self.critical_level)
+        rows, columns = np.nonzero(warning)
+        is_critical = critical[rows, columns]
+        levels = np.where(is_critical, self.critical[profile[rows], columns], self.warning[profile[rows], columns])
+        return pd.DataFrame({
+            # take() keeps timezone-aware timestamps as datetime64 instead of objects
+            'metrics_date_local': df['metrics_date_local'].array.take(rows),
+            'site': df['site'].to_numpy()[rows],
+            'cell_id': df['cell_id'].to_numpy()[rows],
+            'metric': np.asarray(self.metrics, dtype=object)[columns],
+            'value': values[rows, columns],
+            'threshold': levels,
+            'severity': np.where(is_critical, 'critical', 'warning').astype(object),
+        })
+
+_evaluators = {}
+_evaluators_lock = threading.Lock()
+
+def _compile(technology):
+    profiles = list(ThresholdProfile.objects.filter(technology=technology, is_active=True))
+    default = next((profile.thresholds for profile in profiles if not profile.site_class), None)
+    if default is None:
+        default = DEFAULT_THRESHOLDS if technology == 'lte' else {}
+    return ThresholdEvaluator(default, [
+        (profile.sites, profile.thresholds) for profile in profiles if profile.site_class
+    ])
+
+def get_evaluator(technology='lte'):
+    """
+    Compiled evaluator for the active threshold profiles of a technology
+
+    Evaluators are kept per process and rebuilt only after a profile is
+    saved or deleted, which bumps the shared thresholds generation.
+    """
+    generation = caching.thresholds_generation()
+    with _evaluators_lock:
+        cached = _evaluators.get(technology)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+    evaluator = _compile(technology)
+    with _evaluators_lock:
+        _evaluators[technology] = (generation, evaluator)
+    return evaluator
+
+
+class AlertScan:
+    """
+    Alert evaluation for a stream of ingested metrics batches
+
+    ``add`` evaluates each batch as it is stored; ``save`` then opens,
+    updates and closes alerts once for the whole run.
+    """
+
+    def __init__(self, technology='lte'):
+        self.evaluator = get_evaluator(technology)
+        self._breaches = []
+        self._latest = []
+        self.since = None
+        self.sites = set()
+
+    def add(self, df):
+        if df.empty:
+            return
+        dates = pd.to_datetime(df['metrics_date_local'])
+        if dates.dt.tz is None:
+            # Naive timestamps are in the default timezone, as stored by the ORM
+            dates = dates.dt.tz_localize(timezone.get_default_timezone())
+        df = df.assign(metrics_date_local=dates)
+        found = self.evaluator.evaluate(df)
+        if not found.empty:
+            self._breaches.append(found)
+        self._latest.append(df.groupby(['site', 'cell_id'])['metrics_date_local'].max())
+        first = dates.min().to_pydatetime()
+        self.since = first if self.since is None else min(self.since, first)
+        self.sites.update(df['site'].dropna().unique())
+
+    def save(self):
+        """
+        Open, update and close alerts for everything added
+
+        Breaches are grouped per site, cell and metric. A group updates the
+        open alert for its key or opens a new one from the breaches after
+        the key's last recorded recovery, so rows re-read by the ingest
+        lookback don't reopen closed alerts. An open alert is closed when
+        its cell has a newer sample than its latest breach.
+
+        Returns:
+            dict: Number of alerts opened, updated and closed
+        """
+        if self.since is None:
+            return {'opened': 0, 'updated': 0, 'closed': 0}
+        alerts = Alert.objects.filter(site__in=self.sites)
+        found = pd.concat(self._breaches, ignore_index=True) if self._breaches else None
+        latest_samples = pd.concat(self._latest).groupby(level=['site', 'cell_id']).max().to_dict()
+        open_alerts = {(alert.site, alert.cell_id, alert.metric): alert for alert in alerts.filter(status='open')}
+        # Latest recovery already recorded per key
+        recorded = {
+            (row['site'], row['cell_id'], row['metric']): row['closed_at']
+            for row in alerts.filter(status='closed', closed_at__gte=self.since)
+            .values('site', 'cell_id', 'metric').annotate(closed_at=Max('closed_at')).order_by()
+        }
+
+        now = timezone.now()
+        created, changed = [], {}
+        if found is not None:
+            keys = ['site', 'cell_id', 'metric']
+            latest_breaches = found.loc[found.groupby(keys)['metrics_date_local'].idxmax()]
+            after_recovery = found
+            if recorded:
+                recovered = (
+                    pd.Series(recorded, dtype='datetime64[ns, UTC]')
+                    .reindex(pd.MultiIndex.from_frame(found[keys]))
+                    .set_axis(found.index)
+                )
+                after_recovery = found[recovered.isna() | (found['metrics_date_local'] > recovered)]
+            first_seen = after_recovery.groupby(keys)['metrics_date_local'].min().to_dict()
+
+            for latest in latest_breaches.itertuples(index=False):
+                key = (latest.site, latest.cell_id, latest.metric)
+                seen = latest.metrics_date_local.to_pydatetime()
+                alert = open_alerts.get(key)
+                if alert is None:
+                    if key not in first_seen:
+                        continue
+                    alert = Alert(site=key[0], cell_id=key[1], metric=key[2], first_seen=first_seen[key].to_pydatetime())
+                    created.append(alert)
+                elif seen > alert.last_seen or (
+                    seen == alert.last_seen and (latest.severity, latest.value) != (alert.severity, alert.value)
+                ):
+                    changed[key] = alert
+                else:
+                    continue
+                alert.severity = latest.severity
+                alert.value = float(latest.value)
+                alert.threshold = float(latest.threshold)
+                alert.last_seen = seen
+                alert.updated_at = now
+
+        closed = 0
+        for alert in [*open_alerts.values(), *created]:
+            latest_sample = latest_samples.get((alert.site, alert.cell_id))
+            if latest_sample is not None and latest_sample > alert.last_seen:
+                alert.status = 'closed'
+                alert.closed_at = latest_sample.to_pydatetime()
+                alert.updated_at = now
+                changed.setdefault((alert.site, alert.cell_id, alert.metric), alert)
+                closed += 1
+        changed = [alert for alert in changed.values() if alert.pk is not None]
+
+        with transaction.atomic():
+            # A concurrent run may have opened the same alert; keep that one
+            Alert.objects.bulk_create(created, batch_size=1000, ignore_conflicts=True)
+            Alert.objects.bulk_update(
+                changed,
+                ['severity', 'status', 'value', 'threshold', 'last_seen', 'closed_at', 'updated_at'],
+                batch_size=1000,
+            )
+        return {
+            'opened': sum(alert.status == 'open' for alert in created),
+            'updated': len(changed),
+            'closed': closed,
+        }
+
+def evaluate_ingested(since, sites=None, technology='lte'):
+    """
+    Re-evaluate alerts from the metrics stored since ``since``
+
+    Used after a threshold profile change (tasks.reevaluate_alerts) and for
+    backfills that didn't go through AlertScan during ingest. The window is
+    read back column-wise and evaluated like an ingested batch.
+
+    Args:
+        since (datetime): Start of the window
+        sites (iterable): Only these sites; all sites when empty
+        technology (str): Threshold profiles to use
+
+    Returns:
+        dict: Number of alerts opened, updated and closed
+    """
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    scan = AlertScan(technology)
+    rows = NetworkPerformance.objects.filter(is_active=True, metrics_date_local__gte=since)
+    if sites:
+        rows = rows.filter(site__in=sites)
+    columns = KEY_FIELDS + scan.evaluator.metrics
+    scan.add(pd.DataFrame.from_records(rows.order_by().values_list(*columns), columns=columns))
+    return scan.save()
+
+def describe(alert):
+    """Dict for an Alert, in the shape the alerts endpoint returns"""
+    label = alert.metric.replace('_', ' ').title()
+    low = alert.value is not None and alert.value < alert.threshold
+    if alert.severity == 'critical':
+        message = f"{label} is critically {'low' if low else 'high'}"
+    else:
+        message = f"{label} is {'below' if low else 'above'} warning threshold"
+    return {
+        'id': alert.pk,
+        'severity': alert.severity,
+        'status': alert.status,
+        'metric': alert.metric,
+        'message': message,
+        'value': alert.value,
+        'threshold': alert.threshold,
+        'site': alert.site,
+        'cell_id': alert.cell_id,
+        'timestamp': alert.last_seen,
+        'first_seen': alert.first_seen,
+        'closed_at': alert.closed_at,
+    }
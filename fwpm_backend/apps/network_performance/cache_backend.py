@@ -0,0 +1,239 @@
+"""
+django-redis plugins for the shared network performance cache
+
+``MsgpackSerializer`` stores values as msgpack, which is smaller and
+faster to decode than pickle for the lists of metric dicts the views
+cache. DataFrames are stored column by column; any other type msgpack
+can't express is rejected rather than pickled. ``InstrumentedClient``
+counts hits, misses and bytes per key prefix and periodically flushes the
+counts to a Redis hash so every worker's traffic is visible in one place.
+"""
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime
+from decimal import Decimal
+
+import msgpack
+import numpy as np
+import pandas as pd
+from django_redis.client import DefaultClient
+from django_redis.serializers.base import BaseSerializer
+
+_EXT_DATETIME = 1
+_EXT_DATE = 2
+_EXT_DECIMAL = 3
+_EXT_DATAFRAME = 4
+
+STATS_KEY = 'cache_stats'
+STATS_FLUSH_INTERVAL = 10  # seconds
+
+def _default(obj):
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    if isinstance(obj, datetime):
+        return msgpack.ExtType(_EXT_DATETIME, obj.isoformat().encode())
+    if isinstance(obj, date):
+        return msgpack.ExtType(_EXT_DATE, obj.isoformat().encode())
+    if isinstance(obj, Decimal):
+        return msgpack.ExtType(_EXT_DECIMAL, str(obj).encode())
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, pd.DataFrame):
+        return msgpack.ExtType(_EXT_DATAFRAME, _pack(_encode_frame(obj)))
+    raise TypeError(f"Cannot cache values of type {type(obj).__name__}")
+
+def _ext_hook(code, data):
+    if code == _EXT_DATETIME:
+        return datetime.fromisoformat(data.decode())
+    if code == _EXT_DATE:
+        return date.fromisoformat(data.decode())
+    if code == _EXT_DECIMAL:
+        return Decimal(data.decode())
+    if code == _EXT_DATAFRAME:
+        return _decode_frame(_unpack(data))
+    raise ValueError(f"Unknown cache extension type {code}")
+
+def _pack(value):
+    return msgpack.packb(value, default=_default, use_bin_type=True)
+
+def _unpack(value):
+    return msgpack.unpackb(value, ext_hook=_ext_hook, raw=False, strict_map_key=False)
+
+def _encode_column(series):
+    """
+    Encode a column as [dtype, values, mask, tz]
+
+    NumPy numeric, bool and datetime columns are sent as their raw buffer
+    (tz-aware datetimes as UTC plus the zone), nullable extension columns
+    as a filled buffer plus NA mask, categoricals as their codes and
+    categories, and anything else as a list of values.
+    """
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return ['category', {
+            'codes': _encode_column(pd.Series(series.cat.codes.to_numpy())),
+            'categories': _encode_column(dtype.categories.to_series()),
+            'ordered': dtype.ordered,
+        }, None, None]
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        values = series.dt.tz_convert('UTC').dt.tz_localize(None).to_numpy()
+        return [values.dtype.str, values.tobytes(), None, str(dtype.tz)]
+    if isinstance(dtype, np.dtype) and dtype.kind in 'biufmM':
+        return [dtype.str, np.ascontiguousarray(series.to_numpy()).tobytes(), None, None]
+    if isinstance(dtype, pd.api.extensions.ExtensionDtype) and dtype.kind in 'biuf':
+        mask = series.isna().to_numpy()
+        values = series.to_numpy(dtype=dtype.numpy_dtype, na_value=False if dtype.kind == 'b' else 0)
+        return [str(dtype), values.tobytes(), mask.tobytes() if mask.any() else None, None]
+    return [str(dtype), series.tolist(), None, None]
+
+def _decode_column(dtype, values, mask, tz):
+    if dtype == 'category':
+        return pd.Series(pd.Categorical.from_codes(
+            _decode_column(*values['codes']).to_numpy(),
+            categories=_decode_column(*values['categories']),
+            ordered=values['ordered'],
+        ))
+    if isinstance(values, list):
+        series = pd.Series(values, dtype=object)
+        return series if dtype == 'object' else series.astype(dtype)
+    if tz is not None:
+        return pd.Series(np.frombuffer(values, dtype=np.dtype(dtype))).dt.tz_localize('UTC').dt.tz_convert(tz)
+    pandas_dtype = pd.api.types.pandas_dtype(dtype)
+    if isinstance(pandas_dtype, np.dtype):
+        return pd.Series(np.frombuffer(values, dtype=pandas_dtype).copy())
+    series = pd.Series(np.frombuffer(values, dtype=pandas_dtype.numpy_dtype)).astype(pandas_dtype)
+    if mask is not None:
+        series = series.mask(np.frombuffer(mask, dtype=bool))
+    return series
+
+def _encode_frame(df):
+    if isinstance(df.index, pd.MultiIndex) or isinstance(df.columns, pd.MultiIndex):
+        raise TypeError("Cannot cache DataFrames with a MultiIndex")
+    payload = {
+        'columns': list(df.columns),
+        'data': [_encode_column(df.iloc[:, position]) for position in range(df.shape[1])],
+        'index_name': df.index.name,
+    }
+    if isinstance(df.index, pd.RangeIndex):
+        payload['range_index'] = [df.index.start, df.index.stop, df.index.step]
+    else:
+        payload['index'] = _encode_column(df.index.to_series())
+    return payload
+
+def _decode_frame(payload):
+    if 'range_index' in payload:
+        index = pd.RangeIndex(*payload['range_index'], name=payload['index_name'])
+    else:
+        index = pd.Index(_decode_column(*payload['index']), name=payload['index_name'])
+    columns = [_decode_column(*column).set_axis(index) for column in payload['data']]
+    df = pd.concat(columns, axis=1) if columns else pd.DataFrame(index=index)
+    df.columns = pd.Index(payload['columns'], dtype=object)
+    return df
+
+
+class MsgpackSerializer(BaseSerializer):
+    """
+    msgpack serializer with extension types for datetime, date, Decimal,
+    NumPy values and DataFrames; raises TypeError for anything else
+    """
+
+    def dumps(self, value):
+        return _pack(value)
+
+    def loads(self, value):
+        return _unpack(value)
+
+
+def _prefix(key):
+    # "network_perf:lte_metrics:<generation>:<site>:..." -> "network_perf:lte_metrics"
+    return ':'.join(str(key).split(':', 2)[:2])
+
+
+class InstrumentedClient(DefaultClient):
+    """
+    DefaultClient that records hits, misses and bytes read/written per key prefix
+    """
+    _missing = object()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._local = threading.local()
+        self._stats = Counter()
+        self._stats_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def _record(self, prefix, **counts):
+        with self._stats_lock:
+            for field, value in counts.items():
+                if value:
+                    self._stats[f"{prefix}:{field}"] += value
+            due = time.monotonic() - self._last_flush >= STATS_FLUSH_INTERVAL
+        if due:
+            self.flush_stats()
+
+    def flush_stats(self):
+        """Add the counts collected by this process to the shared stats hash"""
+        with self._stats_lock:
+            stats, self._stats = self._stats, Counter()
+            self._last_flush = time.monotonic()
+        if not stats:
+            return
+        try:
+            pipeline = self.get_client(write=True).pipeline()
+            stats_key = self.make_key(STATS_KEY)
+            for field, value in stats.items():
+                pipeline.hincrby(stats_key, field, value)
+            pipeline.execute()
+        except Exception:
+            # Stats are best effort; never fail a cache call over them
+            pass
+
+    def get_stats(self):
+        """Return {prefix: {hits, misses, bytes_read, bytes_written}} across all workers"""
+        self.flush_stats()
+        raw = self.get_client(write=False).hgetall(self.make_key(STATS_KEY))
+        stats = {}
+        for field, value in raw.items():
+            prefix, _, name = field.decode().rpartition(':')
+            stats.setdefault(prefix, {'hits': 0, 'misses': 0, 'bytes_read': 0, 'bytes_written': 0})
+            stats[prefix][name] = int(value)
+        return stats
+
+    def encode(self, value, *args, **kwargs):
+        encoded = super().encode(value, *args, **kwargs)
+        self._local.encoded_bytes = len(encoded) if isinstance(encoded, bytes) else 0
+        return encoded
+
+    def decode(self, value):
+        self._local.decoded_bytes = getattr(self._local, 'decoded_bytes', 0) + (
+            len(value) if isinstance(value, bytes) else 0
+        )
+        return super().decode(value)
+
+    def get(self, key, default=None, version=None, client=None):
+        self._local.decoded_bytes = 0
+        value = super().get(key, default=self._missing, version=version, client=client)
+        hit = value is not self._missing
+        self._record(_prefix(key), hits=int(hit), misses=int(not hit), bytes_read=self._local.decoded_bytes)
+        return value if hit else default
+
+    def get_many(self, keys, version=None, client=None):
+        self._local.decoded_bytes = 0
+        values = super().get_many(keys, version=version, client=client)
+        per_prefix = Counter()
+        for key in keys:
+            per_prefix[(_prefix(key), key in values)] += 1
+        for (prefix, hit), count in per_prefix.items():
+            self._record(prefix, **{'hits' if hit else 'misses': count})
+        if keys:
+            self._record(_prefix(next(iter(keys))), bytes_read=self._local.decoded_bytes)
+        return values
+
+    def set(self, key, value, *args, **kwargs):
+        self._local.encoded_bytes = 0
+        result = super().set(key, value, *args, **kwargs)
+        self._record(_prefix(key), bytes_written=self._local.encoded_bytes)
+        return result
@@ -0,0 +1,540 @@
+"""
+Generation-based cache keys for network performance data
+
+Every cache key embeds a global epoch plus the generation of the scope it
+depends on: the site generation for site-scoped entries, or the network
+generation for entries spanning all sites. Invalidating a site is a single
+counter increment; entries built under an older generation are simply
+never read again and expire on their own TTL, so no key scans are needed.
+
+``get``/``set`` put a small per-process LRU (L1) in front of the shared
+cache (L2). L1 holds the deserialized objects under the same generational
+keys, so it is invalidated together with L2; values returned from it are
+shared and must be treated as read-only.
+
+Windowed queries are cached as per-day fragments (``compose_days``) under
+keys built from whole days (``normalize_window``), so overlapping and
+default ("last 7 days") windows reuse each other's work.
+"""
+import hashlib
+import json
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+from django.core.cache import cache
+
+from . import settings as app_settings
+
+logger = logging.getLogger(__name__)
+
+EPOCH_KEY = f"{app_settings.CACHE_PREFIX}:gen:epoch"
+NETWORK_GENERATION_KEY = f"{app_settings.CACHE_PREFIX}:gen:network"
+THRESHOLDS_GENERATION_KEY = f"{app_settings.CACHE_PREFIX}:gen:thresholds"
+
+def _site_generation_key(site):
+    return f"{app_settings.CACHE_PREFIX}:gen:site:{site}"
+
+def _scope_key(site=None):
+    return _site_generation_key(site) if site else NETWORK_GENERATION_KEY
+
+def _initial_generation():
+    # Seeding from the clock means a counter lost to eviction restarts
+    # above any value it had before, so old entries can't come back to life
+    return int(time.time())
+
+def _get_generations(keys):
+    values = cache.get_many(keys)
+    for key in keys:
+        if values.get(key) is None:
+            cache.add(key, _initial_generation(), timeout=None)
+            values[key] = cache.get(key) or _initial_generation()
+    return [values[key] for key in keys]
+
+def _bump(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Counter was never set or has been evicted
+        value = _initial_generation()
+        cache.set(key, value, timeout=None)
+        return value
+
+def _identity(parts):
+    identity = ':'.join(str(part) for part in parts)
+    if len(identity) > 120:
+        identity = hashlib.md5(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+    return identity
+
+def _key_base(namespace, site=None, generational=True):
+    if not generational:
+        epoch, = _get_generations([EPOCH_KEY])
+        return f"{app_settings.CACHE_PREFIX}:{namespace}:{epoch}:{site or '*'}"
+    epoch, generation = _get_generations([EPOCH_KEY, _scope_key(site)])
+    return f"{app_settings.CACHE_PREFIX}:{namespace}:{epoch}.{generation}:{site or '*'}"
+
+def make_key(namespace, *parts, site=None):
+    """
+    Build a cache key for ``namespace`` scoped to ``site`` (or the whole network)
+
+    ``parts`` identify the entry within its namespace; they are hashed
+    when they would make the key unreasonably long.
+    """
+    return f"{_key_base(namespace, site)}:{_identity(parts)}"
+
+def make_stale_key(namespace, *parts, site=None):
+    """
+    Generation-free key under which the last computed value is kept for
+    stale-while-revalidate serving
+    """
+    return f"{app_settings.CACHE_PREFIX}:{namespace}:stale:{site or '*'}:{_identity(parts)}"
+
+def normalize_window(start_date=None, end_date=None, default_days=None):
+    """
+    Snap a request window to whole days
+
+    Missing bounds default to the ``default_days`` (DEFAULT_WINDOW_DAYS)
+    days before today, and both bounds are truncated to midnight, so every
+    request for the same days builds the same cache key however (and
+    whenever) it was expressed.
+
+    Returns:
+        tuple: (start, end) naive datetimes at midnight; ``end`` is the
+        last day of the window
+    """
+    end_date = _midnight(end_date) if end_date else _midnight(date.today())
+    if start_date:
+        start_date = _midnight(start_date)
+    else:
+        start_date = end_date - timedelta(days=default_days or app_settings.DEFAULT_WINDOW_DAYS)
+    return start_date, end_date
+
+def _midnight(value):
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if not isinstance(value, datetime):
+        return datetime.combine(value, datetime.min.time())
+    return value.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+
+def canonical_params(params):
+    """
+    Canonical form of request parameters for cache keys and access tracking:
+    empty values dropped, strings stripped, dates as ISO strings, names sorted
+    """
+    canonical = {}
+    for name in sorted(params):
+        value = params[name]
+        if isinstance(value, str):
+            value = value.strip()
+        elif isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        if value not in (None, ''):
+            canonical[name] = value
+    return canonical
+
+def invalidate_sites(sites):
+    """
+    Invalidate cached entries for the given sites and everything network-wide
+    """
+    for site in frozenset(sites):
+        if site:
+            _bump(_site_generation_key(site))
+    _bump(NETWORK_GENERATION_KEY)
+
+def invalidate_all():
+    """
+    Invalidate every network performance cache entry
+    """
+    _bump(EPOCH_KEY)
+
+def thresholds_generation():
+    """
+    Generation of the alert threshold profiles, for processes that keep
+    compiled evaluators
+    """
+    return _get_generations([THRESHOLDS_GENERATION_KEY])[0]
+
+def invalidate_thresholds():
+    """
+    Make every process rebuild its threshold evaluators
+    """
+    _bump(THRESHOLDS_GENERATION_KEY)
+
+def get_cache_stats():
+    """
+    Hit/miss/byte counters per key prefix, when the cache backend records them
+    """
+    client = getattr(cache, 'client', None)
+    if not hasattr(client, 'get_stats'):
+        return {}
+    return client.get_stats()
+
+
+def _estimate_size(value, depth=0):
+    """
+    Rough in-memory size of a cached value
+
+    Large lists are sampled rather than walked, so estimating a
+    100k-row result costs about as much as a handful of rows.
+    """
+    if depth > 4:
+        return sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return sys.getsizeof(value)
+        step = max(1, len(value) // 8)
+        sample = value[::step][:8]
+        average = sum(_estimate_size(item, depth + 1) for item in sample) / len(sample)
+        return sys.getsizeof(value) + int(average * len(value))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            _estimate_size(key, depth + 1) + _estimate_size(item, depth + 1)
+            for key, item in value.items()
+        )
+    return sys.getsizeof(value)
+
+
+class LocalCache:
+    """
+    Thread-safe in-process LRU bounded by estimated bytes, with per-entry expiry
+    """
+
+    def __init__(self, max_bytes, max_ttl):
+        self.max_bytes = max_bytes
+        self.max_ttl = max_ttl
+        self._entries = OrderedDict()  # key -> (value, size, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, timeout=None):
+        ttl = self.max_ttl if timeout is None else min(timeout, self.max_ttl)
+        size = _estimate_size(value)
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic() + ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def clear_key(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+local_cache = LocalCache(app_settings.L1_CACHE_MAX_BYTES, app_settings.L1_CACHE_TTL)
+
+def get(key):
+    """
+    Read ``key`` from the in-process cache, falling back to the shared cache
+    """
+    value = local_cache.get(key)
+    if value is not None:
+        return value
+    value = cache.get(key)
+    if value is not None:
+        local_cache.set(key, value)
+    return value
+
+def set(key, value, timeout=app_settings.CACHE_TIMEOUT):
+    """
+    Write ``key`` to both the shared and the in-process cache
+    """
+    cache.set(key, value, timeout=timeout)
+    local_cache.set(key, value, timeout)
+
+def get_many(keys):
+    """
+    Read several keys at once, in-process first; returns {key: value} for the keys found
+    """
+    values = {}
+    missing = []
+    for key in keys:
+        value = local_cache.get(key)
+        if value is None:
+            missing.append(key)
+        else:
+            values[key] = value
+    if missing:
+        for key, value in cache.get_many(missing).items():
+            if value is not None:
+                local_cache.set(key, value)
+                values[key] = value
+    return values
+
+def set_many(mapping, timeout=app_settings.CACHE_TIMEOUT):
+    """
+    Write several keys to both the shared and the in-process cache
+    """
+    if not mapping:
+        return
+    cache.set_many(mapping, timeout=timeout)
+    for key, value in mapping.items():
+        local_cache.set(key, value, timeout)
+
+def compose_days(namespace, parts, start_date, end_date, fetch, day_of, site=None,
+                 generational=True, newest_first=False):
+    """
+    Records for the days ``start_date``..``end_date`` (inclusive), assembled
+    from per-day fragments cached under ``namespace``/``parts``
+
+    Overlapping windows share fragments, so a 31-day request after a 7-day
+    one only fetches the 24 days it doesn't have yet. Missing days are
+    fetched with one ``fetch(first_day, last_day)`` call per run of
+    consecutive days; it returns the records for that run, and
+    ``day_of(record)`` tells which day each one belongs to.
+
+    Days that closed more than INGEST_LOOKBACK_HOURS ago are kept for
+    FRAGMENT_TTL; today, days that may still receive late rows and empty
+    days only for TODAY_FRAGMENT_TTL. Fragments are invalidated with the
+    site generation unless ``generational`` is False, for data that doesn't
+    come from this app's tables (the epoch still applies).
+
+    Returns:
+        list: Records of every day in the window, in day order (newest
+        day first with ``newest_first``)
+    """
+    def fetch_days(first_day, last_day):
+        fetched = {}
+        for record in fetch(first_day, last_day):
+            fetched.setdefault(day_of(record), []).append(record)
+        return fetched
+    
+    fragments = _compose(namespace, parts, start_date, end_date, fetch_days, [], site, generational)
+    if newest_first:
+        fragments.reverse()
+    return [record for fragment in fragments for record in fragment]
+
+def compose_day_frames(namespace, parts, start_date, end_date, fetch, date_column, site=None,
+                       generational=True, newest_first=False):
+    """
+    DataFrame counterpart of ``compose_days``
+
+    ``fetch(first_day, last_day)`` returns a DataFrame whose ``date_column``
+    (datetimes or 'YYYY-MM-DD ...' strings) decides the day of each row.
+    Fragments are cached as DataFrames, so composing a window is a concat
+    rather than a walk over every row.
+    """
+    def fetch_days(first_day, last_day):
+        df = fetch(first_day, last_day)
+        if df is None or df.empty:
+            return {}
+        days = pd.to_datetime(df[date_column].astype(str).str[:10]).dt.date
+        return {day: fragment.reset_index(drop=True) for day, fragment in df.groupby(days, sort=False)}
+    
+    fragments = _compose(namespace, parts, start_date, end_date, fetch_days, pd.DataFrame(), site, generational)
+    if newest_first:
+        fragments.reverse()
+    fragments = [fragment for fragment in fragments if not fragment.empty]
+    if not fragments:
+        return pd.DataFrame()
+    return pd.concat(fragments, ignore_index=True)
+
+def _compose(namespace, parts, start_date, end_date, fetch_days, empty, site, generational):
+    """
+    Per-day fragments for the window, in day order; ``fetch_days(first_day,
+    last_day)`` returns {day: fragment} for a run of missing days
+    """
+    first_day = _midnight(start_date).date()
+    last_day = _midnight(end_date).date()
+    days = [first_day + timedelta(days=i) for i in range((last_day - first_day).days + 1)]
+    base = _key_base(namespace, site, generational)
+    keys = {day: f"{base}:{_identity((*parts, day.isoformat()))}" for day in days}
+    
+    cached = get_many(keys.values())
+    fragments = {day: cached[key] for day, key in keys.items() if key in cached}
+    
+    runs = []
+    for day in days:
+        if day in fragments:
+            continue
+        if runs and runs[-1][-1] + timedelta(days=1) == day:
+            runs[-1].append(day)
+        else:
+            runs.append([day])
+    
+    closed_before = (datetime.now() - timedelta(hours=app_settings.INGEST_LOOKBACK_HOURS)).date()
+    for run in runs:
+        fetched = fetch_days(run[0], run[-1])
+        # Rows outside the run (e.g. the next midnight of an inclusive
+        # BETWEEN) are dropped; days without rows get an empty fragment
+        fetched = {day: fetched.get(day, empty) for day in run}
+        fragments.update(fetched)
+        closed = {day for day, fragment in fetched.items() if day < closed_before and len(fragment)}
+        set_many({keys[day]: fetched[day] for day in closed}, timeout=app_settings.FRAGMENT_TTL)
+        set_many({keys[day]: fragment for day, fragment in fetched.items() if day not in closed},
+                 timeout=app_settings.TODAY_FRAGMENT_TTL)
+    if runs:
+        logger.debug(f"{namespace}: fetched {sum(map(len, runs))} of {len(days)} days in {len(runs)} queries")
+    
+    return [fragments[day] for day in days]
+
+def single_flight(key, compute, timeout=app_settings.CACHE_TIMEOUT, stale_key=None):
+    """
+    Return the cached value for ``key``, computing it at most once across workers
+
+    On a miss one caller takes a short-lived lock in the shared cache and
+    runs ``compute``; concurrent callers are served the previous value
+    stored under ``stale_key`` if there is one, otherwise they wait up to
+    SINGLE_FLIGHT_WAIT_TIMEOUT for the leader's result before computing it
+    themselves. ``compute`` returning None means "don't cache".
+    """
+    value = get(key)
+    if value is not None:
+        return value
+    
+    lock_key = f"{key}:lock"
+    acquired = cache.add(lock_key, 1, timeout=app_settings.SINGLE_FLIGHT_LOCK_TIMEOUT)
+    if acquired is False:
+        if stale_key:
+            stale = cache.get(stale_key)
+            if stale is not None:
+                logger.info(f"Serving stale value for {key} while it is recomputed")
+                return stale
+        
+        deadline = time.monotonic() + app_settings.SINGLE_FLIGHT_WAIT_TIMEOUT
+        delay = 0.05
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+            value = get(key)
+            if value is not None:
+                return value
+            if cache.get(lock_key) is None:
+                # The leader finished without caching anything (e.g. it failed)
+                break
+        logger.info(f"Computing {key} after waiting on another worker")
+        acquired = cache.add(lock_key, 1, timeout=app_settings.SINGLE_FLIGHT_LOCK_TIMEOUT)
+    
+    # A None result from add() means the cache itself is unavailable
+    try:
+        return _compute_and_store(key, compute, timeout, stale_key)
+    finally:
+        if acquired:
+            cache.delete(lock_key)
+
+def _compute_and_store(key, compute, timeout, stale_key):
+    value = compute()
+    if value is not None:
+        set(key, value, timeout)
+        if stale_key:
+            cache.set(stale_key, value, timeout=app_settings.STALE_TTL)
+    return value
+
+def refresh_ahead(key, compute, timeout=app_settings.CACHE_TIMEOUT, stale_key=None):
+    """
+    Recompute ``key`` if it is missing or expires within REFRESH_AHEAD_SECONDS
+
+    Returns True when the entry was rebuilt. Skipped while another worker
+    holds the single-flight lock for the key.
+    """
+    remaining = cache.ttl(key) if hasattr(cache, 'ttl') else 0
+    if remaining is None or remaining > app_settings.REFRESH_AHEAD_SECONDS:
+        return False
+    
+    lock_key = f"{key}:lock"
+    acquired = cache.add(lock_key, 1, timeout=app_settings.SINGLE_FLIGHT_LOCK_TIMEOUT)
+    if acquired is False:
+        return False
+    try:
+        local_cache.clear_key(key)
+        return _compute_and_store(key, compute, timeout, stale_key) is not None
+    finally:
+        if acquired:
+            cache.delete(lock_key)
+
+# Access tracking for the refresher: request counts per hour bucket, in a
+# Redis sorted set when the cache is Redis, otherwise in this process
+_local_access = {}
+_local_access_lock = threading.Lock()
+
+def _redis_connection():
+    try:
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+    except (ImportError, NotImplementedError):
+        return None
+
+def _access_bucket(namespace, hours_ago=0):
+    hour = int(time.time() // 3600) - hours_ago
+    return f"{app_settings.CACHE_PREFIX}:hot:{namespace}:{hour}"
+
+def record_access(namespace, params):
+    """
+    Count a request for the cache entry identified by ``namespace``/``params``
+    """
+    member = json.dumps(params, sort_keys=True, default=str)
+    bucket = _access_bucket(namespace)
+    redis = _redis_connection()
+    if redis is not None:
+        try:
+            pipeline = redis.pipeline()
+            pipeline.zincrby(bucket, 1, member)
+            pipeline.expire(bucket, 2 * 3600)
+            pipeline.execute()
+            return
+        except Exception as e:
+            logger.debug(f"Falling back to local access tracking: {str(e)}")
+    
+    with _local_access_lock:
+        counts = _local_access.setdefault(bucket, {})
+        counts[member] = counts.get(member, 0) + 1
+        # Only the current and previous hour are ever read
+        keep = {bucket, _access_bucket(namespace, 1)}
+        prefix = f"{app_settings.CACHE_PREFIX}:hot:{namespace}:"
+        for expired in [b for b in _local_access if b.startswith(prefix) and b not in keep]:
+            del _local_access[expired]
+
+def hot_keys(namespace, limit=None):
+    """
+    Parameters of the most requested entries in ``namespace`` over the last
+    one to two hours, hottest first
+    """
+    limit = limit or app_settings.REFRESH_TOP_N
+    buckets = [_access_bucket(namespace), _access_bucket(namespace, 1)]
+    totals = {}
+    redis = _redis_connection()
+    if redis is not None:
+        try:
+            for bucket in buckets:
+                for member, score in redis.zrevrange(bucket, 0, limit - 1, withscores=True):
+                    member = member.decode() if isinstance(member, bytes) else member
+                    totals[member] = totals.get(member, 0) + score
+        except Exception as e:
+            logger.debug(f"Reading local access counts instead of Redis: {str(e)}")
+            redis = None
+    if redis is None:
+        with _local_access_lock:
+            for bucket in buckets:
+                for member, count in _local_access.get(bucket, {}).items():
+                    totals[member] = totals.get(member, 0) + count
+    
+    hottest = sorted(totals, key=totals.get, reverse=True)[:limit]
+    return [json.loads(member) for member in hottest]
@@ -29,8 +29,13 @@ app.conf.beat_schedule = {
     },
     'refresh-cache': {
         'task': 'network_performance.tasks.refresh_cache',
-        'schedule': timedelta(hours=1),
-        'options': {'expires': 3600}  # 1 hour
+        'schedule': timedelta(minutes=1),
+        'options': {'expires': 60}  # 1 minute
+    },
+    'create-metric-partitions': {
+        'task': 'network_performance.tasks.create_metric_partitions',
+        'schedule': timedelta(days=1),
+        'options': {'expires': 86400}  # 24 hours
     },
     'cleanup-old-metrics': {
         'task': 'network_performance.tasks.cleanup_old_metrics',
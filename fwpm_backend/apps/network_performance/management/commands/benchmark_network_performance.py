@@ -0,0 +1,426 @@
+import json
+import statistics
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from rest_framework.renderers import JSONRenderer
+
+from fwpm_backend.apps.network_performance import alerts, renderers, starburst_connector, tasks
+from fwpm_backend.apps.network_performance import settings as app_settings
+from fwpm_backend.apps.network_performance.models import Alert, NetworkPerformance, METRIC_FIELDS
+from fwpm_backend.apps.network_performance.views import NetworkPerformanceViewSet
+
+
+FAKE_TRINO_COLUMNS = [
+    ('metrics_date_local', 'varchar'),
+    ('site', 'varchar'),
+    ('cell_id', 'varchar'),
+    ('cell_availability', 'double'),
+    ('dl_cell_throughput', 'double'),
+    ('erab_establishment_attempts', 'bigint'),
+]
+
+
+class FakeTrinoHandler(BaseHTTPRequestHandler):
+    """
+    Minimal Trino client protocol: the statement is queued on POST, the
+    first GET returns every row after ``server.execution_delay`` seconds and
+    the second GET reports the query as finished.
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _uri(self, query_id, page):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}/v1/statement/{query_id}/{page}"
+
+    def do_POST(self):
+        statement = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode()
+        query_id = uuid.uuid4().hex
+        self.server.statements[query_id] = statement
+        self._send({
+            'id': query_id,
+            'infoUri': self._uri(query_id, 'info'),
+            'nextUri': self._uri(query_id, 1),
+            'stats': {'state': 'QUEUED'},
+        })
+
+    def do_GET(self):
+        _, _, _, query_id, page = self.path.split('/')
+        columns = [
+            {
+                'name': name,
+                'type': type_name,
+                'typeSignature': {
+                    'rawType': type_name,
+                    'arguments': [{'kind': 'LONG', 'value': 2147483647}] if type_name == 'varchar' else [],
+                },
+            }
+            for name, type_name in FAKE_TRINO_COLUMNS
+        ]
+        response = {'id': query_id, 'infoUri': self._uri(query_id, 'info'), 'columns': columns}
+
+        if page == '1':
+            # Health checks come back immediately, real queries take execution_delay
+            if self.server.statements.get(query_id, '').strip().upper() != 'SELECT 1':
+                time.sleep(self.server.execution_delay)
+            response['data'] = [
+                ['2024-01-01 00:00:00', 'SITE001', f'CELL{i:03d}', 99.5, 150.2, 120]
+                for i in range(self.server.row_count)
+            ]
+            response['nextUri'] = self._uri(query_id, 2)
+            response['stats'] = {'state': 'RUNNING'}
+        else:
+            response['stats'] = {'state': 'FINISHED'}
+        self._send(response)
+
+    def do_DELETE(self):
+        self.send_response(204)
+        self.end_headers()
+
+
+class FakeTrinoServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Cancelled queries drop their connection mid-response
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Runs network performance micro-benchmarks and prints the timings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'suite',
+            choices=['starburst', 'cell-summary', 'ingest', 'render', 'alerts'],
+            help='Benchmark to run',
+        )
+        parser.add_argument('--iterations', type=int, default=10)
+        parser.add_argument('--rows', type=int, default=100)
+        parser.add_argument(
+            '--cells', type=int, nargs='+', default=[10, 100, 1000],
+            help='Cell counts to benchmark (cell-summary and render suites)',
+        )
+        parser.add_argument(
+            '--ingest-rows', type=int, default=100000,
+            help='Rows per DataFrame (ingest suite)',
+        )
+        parser.add_argument(
+            '--alert-rows', type=int, default=1000000,
+            help='Metrics rows in the last 24 hours (alerts suite)',
+        )
+        parser.add_argument(
+            '--execution-delay', type=float, default=0.05,
+            help='Simulated Starburst execution time in seconds (starburst suite)',
+        )
+
+    def handle(self, *args, **options):
+        getattr(self, f"_benchmark_{options['suite'].replace('-', '_')}")(options)
+
+    def _report(self, label, samples):
+        samples = sorted(samples)
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        self.stdout.write(
+            f"{label:<40} median {statistics.median(samples) * 1000:9.1f} ms"
+            f"   p95 {p95 * 1000:9.1f} ms"
+        )
+
+    def _benchmark_starburst(self, options):
+        """Time-to-first-row for a small site query against a local fake Trino server"""
+        server = FakeTrinoServer(('127.0.0.1', 0), FakeTrinoHandler)
+        server.statements = {}
+        server.execution_delay = options['execution_delay']
+        server.row_count = options['rows']
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        db_config = {
+            'host': '127.0.0.1',
+            'port': server.server_address[1],
+            'http_scheme': 'http',
+            'user': 'benchmark',
+            'password': '',
+            'verify': False,
+            'catalog': 'hive',
+        }
+        query = 'SELECT * FROM network_performance.lte_metrics'
+
+        def legacy_first_row():
+            # The previous implementation slept in one second steps before
+            # fetching; this is its best case of a single poll iteration
+            start = time.perf_counter()
+            with starburst_connector.get_connection_from_pool(db_config) as conn:
+                cursor = conn.cursor()
+                cursor.execute(query)
+                time.sleep(1)
+                cursor.fetchone()
+                elapsed = time.perf_counter() - start
+                cursor.fetchall()
+            return elapsed
+
+        def streaming_first_row():
+            start = time.perf_counter()
+            batches = starburst_connector.execute_query_iter(query, db_config=db_config)
+            next(batches)
+            elapsed = time.perf_counter() - start
+            for _ in batches:
+                pass
+            return elapsed
+
+        try:
+            self.stdout.write(
+                f"Fake Trino: {options['rows']} rows, "
+                f"{options['execution_delay'] * 1000:.0f} ms execution delay"
+            )
+            self._report('legacy poll (time to first row)', [legacy_first_row() for _ in range(options['iterations'])])
+            self._report('event driven (time to first row)', [streaming_first_row() for _ in range(options['iterations'])])
+        finally:
+            server.shutdown()
+
+    def _benchmark_cell_summary(self, options):
+        """Per-cell dashboard summary: boolean-mask loop vs a single groupby"""
+        lte_metrics = [
+            ('availability', 'Cell Availability', 'mean'),
+            ('dl_throughput', 'DL Cell Throughput', 'mean'),
+            ('ul_throughput', 'UL Cell Throughput', 'mean'),
+            ('dl_volume', 'PDCP Volume DL', 'sum'),
+            ('ul_volume', 'PDCP Volume UL', 'sum'),
+            ('latency', 'DL Latency', 'mean'),
+            ('prb_util_dl', 'DL PRB Usage', 'mean'),
+            ('prb_util_ul', 'UL PRB Usage', 'mean'),
+        ]
+        view = NetworkPerformanceViewSet()
+        rng = np.random.default_rng(0)
+        hours = 31 * 24
+
+        def loop_summary(df):
+            cells = []
+            for cell_id in df['eutran_cell_id'].unique():
+                cell_df = df[df['eutran_cell_id'] == cell_id]
+                cells.append({'cell_id': cell_id, **{
+                    key: float(getattr(cell_df[source], how)())
+                    for key, source, how in lte_metrics
+                }})
+            return cells
+
+        for cell_count in options['cells']:
+            rows = cell_count * hours
+            df = pd.DataFrame({
+                'metrics_date_local': np.tile(pd.date_range('2024-01-01', periods=hours, freq='h'), cell_count),
+                'eutran_cell_id': np.repeat([f'CELL{i:04d}' for i in range(cell_count)], hours),
+                **{source: rng.random(rows, dtype=np.float32) * 100 for _, source, _ in lte_metrics},
+            })
+            iterations = max(1, min(options['iterations'], 10000 // cell_count))
+
+            def timed(func):
+                samples = []
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    func(df)
+                    samples.append(time.perf_counter() - start)
+                return samples
+
+            self.stdout.write(f"{cell_count} cells x {hours} hours ({rows} rows)")
+            self._report('  per-cell boolean mask loop', timed(loop_summary))
+            self._report('  grouped aggregation', timed(lambda df: view._summarize_cells(df, 'eutran_cell_id', lte_metrics)))
+
+    def _benchmark_ingest(self, options):
+        """Building NetworkPerformance instances: iterrows vs column-wise conversion"""
+        rows = options['ingest_rows']
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({
+            'metrics_date_local': pd.date_range('2024-01-01', periods=rows, freq='15min'),
+            'site': np.repeat([f'SITE{i:03d}' for i in range(rows // 100 + 1)], 100)[:rows],
+            'cell_id': [f'CELL{i % 1000:04d}' for i in range(rows)],
+            **{field: rng.random(rows, dtype=np.float32) * 100 for field in METRIC_FIELDS},
+        })
+        # Sprinkle missing values so NaN handling is exercised
+        df.loc[df.sample(frac=0.05, random_state=0).index, 'dl_latency'] = np.nan
+
+        def iterrows_build(df):
+            # Previous implementation: one Series and 22 row.get() calls per row
+            return [
+                NetworkPerformance(
+                    metrics_date_local=row['metrics_date_local'],
+                    site=row['site'],
+                    cell_id=row['cell_id'],
+                    **{field: row.get(field) for field in METRIC_FIELDS}
+                )
+                for _, row in df.iterrows()
+            ]
+
+        iterations = max(1, min(options['iterations'], 3))
+        self.stdout.write(f"{rows} rows x {len(df.columns)} columns")
+        for label, func in [
+            ('  iterrows + row.get', iterrows_build),
+            ('  column-wise build', tasks._build_metric_instances),
+        ]:
+            samples = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                func(df)
+                samples.append(time.perf_counter() - start)
+            self._report(label, samples)
+            self.stdout.write(f"{'':<40} {rows / statistics.median(samples):,.0f} rows/sec")
+
+    def _benchmark_render(self, options):
+        """Response rendering for a month of hourly cell metrics: records JSON vs tabular formats"""
+        rng = np.random.default_rng(0)
+        hours = 31 * 24
+        formats = [
+            ('records JSON (to_dict + JSONRenderer)', lambda df: JSONRenderer().render(df.to_dict(orient='records'))),
+            ('columnar JSON', renderers.ColumnarJSONRenderer().render),
+        ]
+        if renderers.pa is not None:
+            formats += [
+                ('Arrow IPC stream', renderers.ArrowStreamRenderer().render),
+                ('Parquet', renderers.ParquetRenderer().render),
+            ]
+
+        for cell_count in options['cells']:
+            rows = cell_count * hours
+            df = pd.DataFrame({
+                'metrics_date_local': np.tile(
+                    pd.date_range('2024-01-01', periods=hours, freq='h').strftime('%Y-%m-%d %H:%M:%S'), cell_count
+                ),
+                'site': 'SITE001',
+                'cell_id': np.repeat([f'CELL{i:04d}' for i in range(cell_count)], hours),
+                **{field: rng.random(rows, dtype=np.float32) * 100 for field in METRIC_FIELDS},
+            })
+            iterations = max(1, min(options['iterations'], 10000 // cell_count))
+
+            self.stdout.write(f"{cell_count} cells x {hours} hours ({rows} rows)")
+            for label, render in formats:
+                samples = []
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    body = render(df)
+                    samples.append(time.perf_counter() - start)
+                self._report(f"  {label}", samples)
+                self.stdout.write(f"{'':<40} {len(body) / 1024 / 1024:9.2f} MB")
+
+    def _benchmark_alerts(self, options):
+        """
+        Alerts for a day of metrics: per-row Python thresholds, the compiled
+        NumPy evaluator, ingest-time evaluation into the Alert table and the
+        re-evaluation run after a threshold change
+        
+        Rows are loaded inside a transaction that is rolled back afterwards,
+        so the database is left as it was.
+        """
+        rows = options['alert_rows']
+        rng = np.random.default_rng(0)
+        periods = 96  # 15 minute intervals
+        cells = max(1, rows // periods)
+        rows = cells * periods
+        start = timezone.localtime().replace(minute=0, second=0, microsecond=0, tzinfo=None) - pd.Timedelta(hours=23)
+        df = pd.DataFrame({
+            'metrics_date_local': np.tile(pd.date_range(start, periods=periods, freq='15min'), cells),
+            'site': np.repeat([f'SITE{i // 3:05d}' for i in range(cells)], periods),
+            'cell_id': np.repeat([f'CELL{i:06d}' for i in range(cells)], periods),
+            **{field: rng.random(rows, dtype=np.float32) * 20 + 40 for field in METRIC_FIELDS},
+        })
+        # Mostly healthy values with about 1% of each metric breaching
+        healthy = {
+            'cell_availability': 99.5, 'dl_cell_throughput': 120.0, 'ul_cell_throughput': 30.0,
+            'dl_latency': 20.0, 'dl_prb_usage': 40.0, 'ul_prb_usage': 30.0,
+        }
+        for field, value in healthy.items():
+            threshold = alerts.DEFAULT_THRESHOLDS[field]
+            df[field] = np.float32(value)
+            breaching = rng.random(rows) < 0.01
+            df.loc[breaching, field] = np.where(
+                rng.random(breaching.sum()) < 0.5, threshold['critical'], threshold['warning']
+            ) + (-1 if threshold['type'] == 'min' else 1)
+
+        def legacy_alerts(since):
+            # Previous implementation: every row loaded as a model instance
+            # and compared field by field (iterator() keeps memory bounded)
+            found = []
+            for metric in NetworkPerformance.objects.filter(metrics_date_local__gte=since, is_active=True).iterator(chunk_size=2000):
+                for field, threshold in alerts.DEFAULT_THRESHOLDS.items():
+                    value = getattr(metric, field)
+                    if value is None:
+                        continue
+                    low = threshold['type'] == 'min'
+                    if (value < threshold['critical']) if low else (value > threshold['critical']):
+                        found.append(('critical', metric.metrics_date_local, field, value))
+                    elif (value < threshold['warning']) if low else (value > threshold['warning']):
+                        found.append(('warning', metric.metrics_date_local, field, value))
+            found.sort(key=lambda alert: (0 if alert[0] == 'critical' else 1, alert[1]), reverse=True)
+            return len(found)
+
+        def alert_table_page(severity=None):
+            queryset = Alert.objects.filter(status='open')
+            if severity:
+                queryset = queryset.filter(severity=severity)
+            return queryset.count(), [alerts.describe(alert) for alert in queryset[:50]]
+
+        def timed(func, iterations):
+            samples = []
+            for _ in range(iterations):
+                begin = time.perf_counter()
+                result = func()
+                samples.append(time.perf_counter() - begin)
+            return samples, result
+
+        since = timezone.now() - pd.Timedelta(hours=24)
+        with transaction.atomic():
+            begin = time.perf_counter()
+            tasks._store_metrics_batch(df, chunk_size=50000)
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(f"ANALYZE {connection.ops.quote_name(NetworkPerformance._meta.db_table)}")
+            self.stdout.write(f"{rows} rows ({cells} cells x {periods} intervals) loaded in {time.perf_counter() - begin:.1f} s")
+
+            samples, count = timed(lambda: legacy_alerts(since), 1)
+            self._report('  per-row Python (all alerts)', samples)
+            self.stdout.write(f"{'':<40} {count} alerts")
+            iterations = max(1, options['iterations'])
+
+            evaluator = alerts.get_evaluator()
+            samples, found = timed(lambda: evaluator.evaluate(df), iterations)
+            self._report('  NumPy evaluator (whole day in memory)', samples)
+            self.stdout.write(f"{'':<40} {len(found)} alerts")
+
+            def ingest_scan(batch):
+                scan = alerts.AlertScan()
+                for i in range(0, len(batch), 50000):
+                    scan.add(batch.iloc[i:i + 50000])
+                return scan.save()
+
+            # Ingest-time evaluation: the first run sees the whole day, later
+            # runs only the lookback window of each 15 minute ingest
+            samples, counts = timed(lambda: ingest_scan(df), 1)
+            self._report('  ingest scan + save (first run, 24 h)', samples)
+            self.stdout.write(f"{'':<40} {counts}")
+            window_start = df['metrics_date_local'].max() - pd.Timedelta(hours=app_settings.INGEST_LOOKBACK_HOURS)
+            window = df[df['metrics_date_local'] >= window_start]
+            samples, counts = timed(lambda: ingest_scan(window), iterations)
+            self._report('  ingest scan + save (lookback window)', samples)
+            self.stdout.write(f"{'':<40} {len(window)} rows, {counts}")
+            samples, counts = timed(lambda: alerts.evaluate_ingested(since), 1)
+            self._report('  re-evaluation (threshold change, 24 h)', samples)
+            self.stdout.write(f"{'':<40} {counts}")
+            for label, severity in [('  Alert table (count + first page)', None), ('  Alert table critical only', 'critical')]:
+                samples, (count, _) = timed(lambda: alert_table_page(severity), iterations)
+                self._report(label, samples)
+                self.stdout.write(f"{'':<40} {count} open alerts")
+            transaction.set_rollback(True)
@@ -0,0 +1,73 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Max, Min, Window
+from django.db.models.functions import RowNumber
+
+from fwpm_backend.apps.network_performance.models import NetworkPerformance, NATURAL_KEY_FIELDS
+
+
+class Command(BaseCommand):
+    help = (
+        'Removes duplicate NetworkPerformance rows, keeping the most recently '
+        'updated row per (metrics_date_local, site, cell_id).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--window-hours', type=int, default=24,
+            help='Width of the metrics_date_local window scanned per step',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Maximum rows deleted per transaction',
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=0.0,
+            help='Seconds to pause between transactions to let other writers in',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Count duplicates without deleting')
+
+    def handle(self, *args, **options):
+        bounds = NetworkPerformance.objects.aggregate(
+            first=Min('metrics_date_local'), last=Max('metrics_date_local')
+        )
+        if bounds['first'] is None:
+            self.stdout.write('No metrics rows found')
+            return
+
+        window = timedelta(hours=options['window_hours'])
+        batch_size = options['batch_size']
+        total = 0
+        window_start = bounds['first']
+        while window_start <= bounds['last']:
+            window_end = window_start + window
+            # Every copy after the newest one in its natural key group
+            duplicate_ids = list(
+                NetworkPerformance.objects
+                .filter(metrics_date_local__gte=window_start, metrics_date_local__lt=window_end)
+                .annotate(copy_number=Window(
+                    RowNumber(),
+                    partition_by=[F(field) for field in NATURAL_KEY_FIELDS],
+                    order_by=[F('updated_at').desc(), F('id').desc()],
+                ))
+                .filter(copy_number__gt=1)
+                .values_list('id', flat=True)
+            )
+
+            if duplicate_ids and not options['dry_run']:
+                for i in range(0, len(duplicate_ids), batch_size):
+                    with transaction.atomic():
+                        NetworkPerformance.objects.filter(id__in=duplicate_ids[i:i + batch_size]).delete()
+                    if options['sleep']:
+                        time.sleep(options['sleep'])
+
+            if duplicate_ids:
+                self.stdout.write(f"{window_start:%Y-%m-%d %H:%M}: {len(duplicate_ids)} duplicate rows")
+            total += len(duplicate_ids)
+            window_start = window_end
+
+        action = 'Found' if options['dry_run'] else 'Removed'
+        self.stdout.write(self.style.SUCCESS(f"{action} {total} duplicate rows"))
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from fwpm_backend.apps.network_performance import partitions
+from fwpm_backend.apps.network_performance import settings as app_settings
+
+
+class Command(BaseCommand):
+    help = (
+        'Manages PostgreSQL range partitions of the NetworkPerformance table: '
+        'converts the table once with --convert, then pre-creates upcoming partitions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert', action='store_true',
+            help='Rebuild the existing table as a partitioned table (takes an exclusive lock)',
+        )
+        parser.add_argument(
+            '--interval', choices=['day', 'week'], default=app_settings.PARTITION_INTERVAL,
+            help='Partition width',
+        )
+        parser.add_argument(
+            '--days-ahead', type=int, default=app_settings.PARTITION_PRECREATE_DAYS,
+            help='Number of future days to pre-create partitions for',
+        )
+        parser.add_argument(
+            '--keep-legacy', action='store_true',
+            help='Keep the original table as <table>_legacy after --convert',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Partitioning requires PostgreSQL')
+
+        if options['convert']:
+            if partitions.is_partitioned():
+                raise CommandError(f"{partitions.TABLE} is already partitioned")
+            copied = partitions.convert_to_partitioned(
+                interval=options['interval'],
+                days_ahead=options['days_ahead'],
+                keep_legacy=options['keep_legacy'],
+            )
+            self.stdout.write(self.style.SUCCESS(f"Converted {partitions.TABLE}, {copied} rows copied"))
+        elif not partitions.is_partitioned():
+            raise CommandError(f"{partitions.TABLE} is not partitioned; run with --convert first")
+
+        today = datetime.now()
+        created = partitions.ensure_partitions(
+            today, today + timedelta(days=options['days_ahead']), options['interval']
+        )
+        for name in created:
+            self.stdout.write(f"Created {name}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(partitions.list_partitions())} partitions, {len(created)} created"
+        ))
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('network_performance', '0002_rename_network_per_metrics_06f4c6_idx_network_per_metrics_30d4d7_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NetworkPerformanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.CharField(choices=[('network', 'Network'), ('site', 'Site')], max_length=10)),
+                ('time_granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=10)),
+                ('bucket', models.DateTimeField()),
+                ('site', models.CharField(blank=True, default='', max_length=100)),
+                ('sample_count', models.IntegerField(default=0)),
+                ('cell_availability', models.FloatField(null=True)),
+                ('abnormal_release', models.FloatField(null=True)),
+                ('erab_retainability', models.FloatField(null=True)),
+                ('erab_establishment_attempts', models.FloatField(null=True)),
+                ('erab_establishment_successes', models.FloatField(null=True)),
+                ('avg_rrc_conn_ue', models.FloatField(null=True)),
+                ('avg_active_ue_dl', models.FloatField(null=True)),
+                ('avg_active_ue_ul', models.FloatField(null=True)),
+                ('dl_cell_capacity', models.FloatField(null=True)),
+                ('ul_cell_capacity', models.FloatField(null=True)),
+                ('dl_cell_throughput', models.FloatField(null=True)),
+                ('ul_cell_throughput', models.FloatField(null=True)),
+                ('dl_ue_throughput', models.FloatField(null=True)),
+                ('ul_ue_throughput', models.FloatField(null=True)),
+                ('pdcp_volume_dl', models.FloatField(null=True)),
+                ('pdcp_volume_ul', models.FloatField(null=True)),
+                ('dl_prb_usage', models.FloatField(null=True)),
+                ('ul_prb_usage', models.FloatField(null=True)),
+                ('dl_latency', models.FloatField(null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Network Performance Rollup',
+                'verbose_name_plural': 'Network Performance Rollups',
+                'ordering': ['-bucket'],
+                'indexes': [models.Index(fields=['level', 'time_granularity', 'bucket'], name='network_per_level_6a86e9_idx')],
+                'constraints': [models.UniqueConstraint(fields=('level', 'time_granularity', 'site', 'bucket'), name='unique_network_perf_rollup')],
+            },
+        ),
+    ]
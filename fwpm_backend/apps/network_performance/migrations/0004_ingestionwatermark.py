@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('network_performance', '0003_networkperformancerollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestionWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=50)),
+                ('site', models.CharField(blank=True, default='', max_length=100)),
+                ('watermark', models.DateTimeField()),
+                ('last_rows_fetched', models.IntegerField(default=0)),
+                ('last_rows_new', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Ingestion Watermark',
+                'verbose_name_plural': 'Ingestion Watermarks',
+                'constraints': [models.UniqueConstraint(fields=('source', 'site'), name='unique_ingestion_watermark')],
+            },
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:10
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_no_duplicates(apps, schema_editor):
+    # Adding the constraint to a table with duplicate rows fails half way
+    # through; fail early with a pointer to the batched dedup command
+    NetworkPerformance = apps.get_model('network_performance', 'NetworkPerformance')
+    duplicates = (
+        NetworkPerformance.objects
+        .values('metrics_date_local', 'site', 'cell_id')
+        .annotate(rows=Count('id'))
+        .filter(rows__gt=1)
+    )
+    if duplicates.exists():
+        raise RuntimeError(
+            "NetworkPerformance has duplicate (metrics_date_local, site, cell_id) rows; "
+            "run 'python manage.py dedup_network_performance' before migrating"
+        )
+
+
+NATURAL_KEY = models.UniqueConstraint(
+    fields=('metrics_date_local', 'site', 'cell_id'), name='unique_network_perf_natural_key'
+)
+
+
+def add_natural_key(apps, schema_editor):
+    # On PostgreSQL the unique index is built CONCURRENTLY so ingest and
+    # reads aren't blocked while it scans the table, then attached as the
+    # constraint. AddIndexConcurrently can't build a unique index, hence SQL.
+    NetworkPerformance = apps.get_model('network_performance', 'NetworkPerformance')
+    table = schema_editor.quote_name(NetworkPerformance._meta.db_table)
+    name = schema_editor.quote_name(NATURAL_KEY.name)
+    columns = ', '.join(map(schema_editor.quote_name, NATURAL_KEY.fields))
+    if schema_editor.connection.vendor != 'postgresql':
+        # SQLite adds constraints by rebuilding the table from the historical
+        # model, which doesn't have this one yet; a unique index serves the
+        # same upserts
+        schema_editor.execute(f"CREATE UNIQUE INDEX {name} ON {table} ({columns})")
+        return
+    
+    # An interrupted CREATE INDEX CONCURRENTLY leaves an invalid index behind
+    schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    schema_editor.execute(f"CREATE UNIQUE INDEX CONCURRENTLY {name} ON {table} ({columns})")
+    schema_editor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE USING INDEX {name}")
+
+
+def remove_natural_key(apps, schema_editor):
+    NetworkPerformance = apps.get_model('network_performance', 'NetworkPerformance')
+    schema_editor.remove_constraint(NetworkPerformance, NATURAL_KEY)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('network_performance', '0004_ingestionwatermark'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_no_duplicates, migrations.RunPython.noop),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(add_natural_key, remove_natural_key),
+            ],
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name='networkperformance',
+                    constraint=NATURAL_KEY,
+                ),
+            ],
+        ),
+        # Dropped only once the natural key index can serve its lookups
+        migrations.RemoveIndex(
+            model_name='networkperformance',
+            name='network_per_metrics_30d4d7_idx',
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('network_performance', '0005_networkperformance_natural_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Alert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('site', models.CharField(max_length=100)),
+                ('cell_id', models.CharField(max_length=100)),
+                ('metric', models.CharField(max_length=50)),
+                ('severity', models.CharField(choices=[('critical', 'Critical'), ('warning', 'Warning')], max_length=10)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('closed', 'Closed')], default='open', max_length=10)),
+                ('value', models.FloatField(null=True)),
+                ('threshold', models.FloatField()),
+                ('first_seen', models.DateTimeField()),
+                ('last_seen', models.DateTimeField()),
+                ('closed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Alert',
+                'verbose_name_plural': 'Alerts',
+                'ordering': ['severity', '-last_seen'],
+                'indexes': [models.Index(fields=['status', 'severity', '-last_seen'], name='network_per_status_12bf31_idx'), models.Index(fields=['site', 'status', '-last_seen'], name='network_per_site_50d3a0_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'open')), fields=('site', 'cell_id', 'metric'), name='unique_open_alert')],
+            },
+        ),
+    ]
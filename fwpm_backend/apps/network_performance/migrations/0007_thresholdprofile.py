@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:48
+
+from django.db import migrations, models
+
+
+# Thresholds the alerts endpoint used before they were configurable
+DEFAULT_LTE_THRESHOLDS = {
+    'cell_availability': {'warning': 98.0, 'critical': 95.0, 'type': 'min'},
+    'dl_cell_throughput': {'warning': 50.0, 'critical': 25.0, 'type': 'min'},
+    'ul_cell_throughput': {'warning': 10.0, 'critical': 5.0, 'type': 'min'},
+    'dl_latency': {'warning': 50.0, 'critical': 100.0, 'type': 'max'},
+    'dl_prb_usage': {'warning': 80.0, 'critical': 90.0, 'type': 'max'},
+    'ul_prb_usage': {'warning': 80.0, 'critical': 90.0, 'type': 'max'},
+}
+
+
+def create_default_profile(apps, schema_editor):
+    ThresholdProfile = apps.get_model('network_performance', 'ThresholdProfile')
+    ThresholdProfile.objects.get_or_create(
+        technology='lte',
+        site_class='',
+        defaults={'name': 'LTE default', 'thresholds': DEFAULT_LTE_THRESHOLDS},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('network_performance', '0006_alert'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThresholdProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('technology', models.CharField(choices=[('lte', 'LTE'), ('nr', 'NR')], default='lte', max_length=10)),
+                ('site_class', models.CharField(blank=True, default='', max_length=50)),
+                ('sites', models.JSONField(blank=True, default=list)),
+                ('thresholds', models.JSONField(default=dict)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Threshold Profile',
+                'verbose_name_plural': 'Threshold Profiles',
+                'ordering': ['technology', 'site_class'],
+                'constraints': [models.UniqueConstraint(fields=('technology', 'site_class'), name='unique_threshold_profile')],
+            },
+        ),
+        migrations.RunPython(create_default_profile, migrations.RunPython.noop),
+    ]
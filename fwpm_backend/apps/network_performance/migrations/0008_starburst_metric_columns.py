@@ -0,0 +1,233 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('network_performance', '0007_thresholdprofile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='networkperformance',
+            name='cqi_weighted',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformance',
+            name='dl_16qam_ratio',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformance',
+            name='dl_256qam_ratio',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformance',
+            name='dl_2cc_configured',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformance',
+            name='dl_3cc_configured',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformance',
+            name='dl_4cc_configured',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformance',
+            name='dl_64qam_ratio',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformance',
+            name='dl_harq_bler',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformance',
+            name='dl_packet_loss',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformance',
+            name='dl_qpsk_ratio',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformance',
+            name='handover_exec_success_rate_inter',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformance',
+            name='handover_exec_success_rate_intra',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformance',
+            name='handover_prep_success_rate_inter',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformance',
+            name='handover_prep_success_rate_intra',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformance',
+            name='sinr_pucch',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformance',
+            name='sinr_pusch',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformance',
+            name='ul_16qam_ratio',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformance',
+            name='ul_2cc_configured',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformance',
+            name='ul_64qam_ratio',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformance',
+            name='ul_harq_bler',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformance',
+            name='ul_packet_loss',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformance',
+            name='ul_qpsk_ratio',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformancerollup',
+            name='cqi_weighted',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformancerollup',
+            name='dl_16qam_ratio',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformancerollup',
+            name='dl_256qam_ratio',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformancerollup',
+            name='dl_2cc_configured',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformancerollup',
+            name='dl_3cc_configured',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformancerollup',
+            name='dl_4cc_configured',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformancerollup',
+            name='dl_64qam_ratio',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformancerollup',
+            name='dl_harq_bler',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformancerollup',
+            name='dl_packet_loss',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformancerollup',
+            name='dl_qpsk_ratio',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformancerollup',
+            name='handover_exec_success_rate_inter',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformancerollup',
+            name='handover_exec_success_rate_intra',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformancerollup',
+            name='handover_prep_success_rate_inter',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformancerollup',
+            name='handover_prep_success_rate_intra',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformancerollup',
+            name='sinr_pucch',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformancerollup',
+            name='sinr_pusch',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformancerollup',
+            name='ul_16qam_ratio',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformancerollup',
+            name='ul_2cc_configured',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformancerollup',
+            name='ul_64qam_ratio',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformancerollup',
+            name='ul_harq_bler',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformancerollup',
+            name='ul_packet_loss',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='networkperformancerollup',
+            name='ul_qpsk_ratio',
+            field=models.FloatField(null=True),
+        ),
+    ]
@@ -1,9 +1,48 @@
-from django.db import models
-from django.core.cache import cache
-from datetime import datetime
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Avg, Count, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from datetime import datetime, timedelta
+from . import caching
 
 # Create your models here.
 
+# Natural key of a NetworkPerformance row
+NATURAL_KEY_FIELDS = ('metrics_date_local', 'site', 'cell_id')
+
+# Metric columns shared by NetworkPerformance and its rollups, in the
+# order the Starburst LTE query returns them
+METRIC_FIELDS = (
+    'cell_availability', 'abnormal_release', 'erab_retainability',
+    'erab_establishment_attempts', 'erab_establishment_successes',
+    'avg_rrc_conn_ue', 'avg_active_ue_dl', 'avg_active_ue_ul',
+    'dl_cell_capacity', 'ul_cell_capacity',
+    'dl_cell_throughput', 'ul_cell_throughput',
+    'dl_ue_throughput', 'ul_ue_throughput',
+    'pdcp_volume_dl', 'pdcp_volume_ul',
+    'dl_prb_usage', 'ul_prb_usage',
+    'dl_256qam_ratio', 'dl_64qam_ratio', 'dl_16qam_ratio', 'dl_qpsk_ratio',
+    'ul_64qam_ratio', 'ul_16qam_ratio', 'ul_qpsk_ratio',
+    'dl_latency', 'sinr_pusch', 'sinr_pucch', 'cqi_weighted',
+    'dl_packet_loss', 'ul_packet_loss', 'dl_harq_bler', 'ul_harq_bler',
+    'dl_2cc_configured', 'dl_3cc_configured', 'dl_4cc_configured', 'ul_2cc_configured',
+    'handover_prep_success_rate_intra', 'handover_exec_success_rate_intra',
+    'handover_prep_success_rate_inter', 'handover_exec_success_rate_inter',
+)
+
+# Counters and volumes that are summed rather than averaged when rows are
+# aggregated into a site or network bucket
+SUMMED_METRIC_FIELDS = (
+    'erab_establishment_attempts', 'erab_establishment_successes',
+    'pdcp_volume_dl', 'pdcp_volume_ul',
+)
+
+def _aware(value):
+    return timezone.make_aware(value) if timezone.is_naive(value) else value
+
 class NetworkPerformance(models.Model):
     metrics_date_local = models.DateTimeField(db_index=True)
     site = models.CharField(max_length=100, db_index=True)
@@ -30,14 +69,44 @@ class NetworkPerformance(models.Model):
     ul_prb_usage = models.FloatField(null=True)
     dl_latency = models.FloatField(null=True)
     
+    # Radio Quality, Carrier Aggregation and Mobility Metrics
+    dl_256qam_ratio = models.FloatField(null=True)
+    dl_64qam_ratio = models.FloatField(null=True)
+    dl_16qam_ratio = models.FloatField(null=True)
+    dl_qpsk_ratio = models.FloatField(null=True)
+    ul_64qam_ratio = models.FloatField(null=True)
+    ul_16qam_ratio = models.FloatField(null=True)
+    ul_qpsk_ratio = models.FloatField(null=True)
+    sinr_pusch = models.FloatField(null=True)
+    sinr_pucch = models.FloatField(null=True)
+    cqi_weighted = models.FloatField(null=True)
+    dl_packet_loss = models.FloatField(null=True)
+    ul_packet_loss = models.FloatField(null=True)
+    dl_harq_bler = models.FloatField(null=True)
+    ul_harq_bler = models.FloatField(null=True)
+    dl_2cc_configured = models.FloatField(null=True)
+    dl_3cc_configured = models.FloatField(null=True)
+    dl_4cc_configured = models.FloatField(null=True)
+    ul_2cc_configured = models.FloatField(null=True)
+    handover_prep_success_rate_intra = models.FloatField(null=True)
+    handover_exec_success_rate_intra = models.FloatField(null=True)
+    handover_prep_success_rate_inter = models.FloatField(null=True)
+    handover_exec_success_rate_inter = models.FloatField(null=True)
+    
     # Meta fields
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
 
     class Meta:
+        # The natural key index also serves (metrics_date_local, site) lookups
+        constraints = [
+            models.UniqueConstraint(
+                fields=['metrics_date_local', 'site', 'cell_id'],
+                name='unique_network_perf_natural_key',
+            ),
+        ]
         indexes = [
-            models.Index(fields=['metrics_date_local', 'site']),
             models.Index(fields=['metrics_date_local', 'cell_id']),
             models.Index(fields=['site', 'cell_id']),
         ]
@@ -49,14 +118,54 @@ class NetworkPerformance(models.Model):
         return f"{self.site} - {self.cell_id} - {self.metrics_date_local}"
 
     @classmethod
-    def get_cached_metrics(cls, site=None, cell_id=None, start_date=None, end_date=None):
-        """Get metrics with caching"""
-        cache_key = f"network_perf:{site}:{cell_id}:{start_date}:{end_date}"
-        cached_data = cache.get(cache_key)
+    def get_cached_metrics(cls, site=None, cell_id=None, start_date=None, end_date=None,
+                           level=None, time_granularity='hour'):
+        """
+        Get metrics with caching
+        
+        Network and site level requests (``level`` set, no ``cell_id``) are
+        served from the pre-aggregated rollup table instead of cell rows.
+        Bounded windows are composed from cached per-day fragments, so
+        overlapping windows share work and the exact bounds (often a
+        ``now()`` with microseconds) never end up in a cache key.
+        """
+        use_rollups = level in ('network', 'site') and not cell_id
+        
+        if start_date and end_date:
+            start_date, end_date = _aware(start_date), _aware(end_date)
+            date_field = 'bucket' if use_rollups else 'metrics_date_local'
+            records = caching.compose_days(
+                'metrics', (level, time_granularity, cell_id),
+                timezone.localtime(start_date), timezone.localtime(end_date),
+                lambda first_day, last_day: cls._metrics_values(
+                    use_rollups, level, time_granularity, site, cell_id,
+                    _aware(datetime.combine(first_day, datetime.min.time())),
+                    _aware(datetime.combine(last_day, datetime.max.time())),
+                ),
+                lambda record: timezone.localtime(record[date_field]).date(),
+                site=site,
+            )
+            return [record for record in records if start_date <= record[date_field] <= end_date]
+        
+        cache_key = caching.make_key(
+            'metrics', level, time_granularity, cell_id, start_date, end_date, site=site
+        )
+        cached_data = caching.get(cache_key)
         
         if cached_data:
             return cached_data
         
+        data = cls._metrics_values(use_rollups, level, time_granularity, site, cell_id, start_date, end_date)
+        caching.set(cache_key, data, timeout=3600)  # Cache for 1 hour
+        return data
+
+    @classmethod
+    def _metrics_values(cls, use_rollups, level, time_granularity, site, cell_id, start_date, end_date):
+        if use_rollups:
+            return list(NetworkPerformanceRollup.for_window(
+                level, time_granularity, start_date, end_date, site=site
+            ).values())
+        
         queryset = cls.objects.filter(is_active=True)
         if site:
             queryset = queryset.filter(site=site)
@@ -66,24 +175,351 @@ class NetworkPerformance(models.Model):
             queryset = queryset.filter(metrics_date_local__gte=start_date)
         if end_date:
             queryset = queryset.filter(metrics_date_local__lte=end_date)
-        
-        data = list(queryset.values())
-        cache.set(cache_key, data, timeout=3600)  # Cache for 1 hour
-        return data
+        return list(queryset.values())
 
     def save(self, *args, **kwargs):
         """Override save to handle cache invalidation"""
-        # Invalidate relevant caches - use direct cache keys instead of patterns
-        # since Django's default cache backend doesn't support delete_pattern
+        super().save(*args, **kwargs)
         
-        # Clear site-specific caches
-        site_key = f"network_perf:{self.site}:{self.cell_id}:*"
-        for key in [
-            f"network_perf:{self.site}:{self.cell_id}:None:None",
-            f"network_perf:{self.site}:None:None:None",
-            f"network_perf:None:{self.cell_id}:None:None",
-        ]:
-            cache.delete(key)
+        # Moves this site (and the network-wide scope) to a new cache generation
+        caching.invalidate_sites([self.site])
+
+
+class NetworkPerformanceRollup(models.Model):
+    """
+    Pre-aggregated NetworkPerformance metrics per site or for the whole
+    network, bucketed by hour or day. Maintained by the ingest task so
+    network and site views read a handful of rows instead of every cell row.
+    """
+    LEVEL_CHOICES = [
+        ('network', 'Network'),
+        ('site', 'Site'),
+    ]
+    GRANULARITY_CHOICES = [
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    ]
+    
+    level = models.CharField(max_length=10, choices=LEVEL_CHOICES)
+    time_granularity = models.CharField(max_length=10, choices=GRANULARITY_CHOICES)
+    bucket = models.DateTimeField()
+    site = models.CharField(max_length=100, blank=True, default='')  # Empty for network level
+    sample_count = models.IntegerField(default=0)
+    
+    # Aggregated Performance Metrics (SUMMED_METRIC_FIELDS are sums, the rest averages)
+    cell_availability = models.FloatField(null=True)
+    abnormal_release = models.FloatField(null=True)
+    erab_retainability = models.FloatField(null=True)
+    erab_establishment_attempts = models.FloatField(null=True)
+    erab_establishment_successes = models.FloatField(null=True)
+    avg_rrc_conn_ue = models.FloatField(null=True)
+    avg_active_ue_dl = models.FloatField(null=True)
+    avg_active_ue_ul = models.FloatField(null=True)
+    dl_cell_capacity = models.FloatField(null=True)
+    ul_cell_capacity = models.FloatField(null=True)
+    dl_cell_throughput = models.FloatField(null=True)
+    ul_cell_throughput = models.FloatField(null=True)
+    dl_ue_throughput = models.FloatField(null=True)
+    ul_ue_throughput = models.FloatField(null=True)
+    pdcp_volume_dl = models.FloatField(null=True)
+    pdcp_volume_ul = models.FloatField(null=True)
+    dl_prb_usage = models.FloatField(null=True)
+    ul_prb_usage = models.FloatField(null=True)
+    dl_latency = models.FloatField(null=True)
+    
+    # Radio Quality, Carrier Aggregation and Mobility Metrics
+    dl_256qam_ratio = models.FloatField(null=True)
+    dl_64qam_ratio = models.FloatField(null=True)
+    dl_16qam_ratio = models.FloatField(null=True)
+    dl_qpsk_ratio = models.FloatField(null=True)
+    ul_64qam_ratio = models.FloatField(null=True)
+    ul_16qam_ratio = models.FloatField(null=True)
+    ul_qpsk_ratio = models.FloatField(null=True)
+    sinr_pusch = models.FloatField(null=True)
+    sinr_pucch = models.FloatField(null=True)
+    cqi_weighted = models.FloatField(null=True)
+    dl_packet_loss = models.FloatField(null=True)
+    ul_packet_loss = models.FloatField(null=True)
+    dl_harq_bler = models.FloatField(null=True)
+    ul_harq_bler = models.FloatField(null=True)
+    dl_2cc_configured = models.FloatField(null=True)
+    dl_3cc_configured = models.FloatField(null=True)
+    dl_4cc_configured = models.FloatField(null=True)
+    ul_2cc_configured = models.FloatField(null=True)
+    handover_prep_success_rate_intra = models.FloatField(null=True)
+    handover_exec_success_rate_intra = models.FloatField(null=True)
+    handover_prep_success_rate_inter = models.FloatField(null=True)
+    handover_exec_success_rate_inter = models.FloatField(null=True)
+    
+    # Meta fields
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['level', 'time_granularity', 'site', 'bucket'],
+                name='unique_network_perf_rollup',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['level', 'time_granularity', 'bucket']),
+        ]
+        ordering = ['-bucket']
+        verbose_name = 'Network Performance Rollup'
+        verbose_name_plural = 'Network Performance Rollups'
+
+    def __str__(self):
+        return f"{self.level}/{self.time_granularity} - {self.site or 'network'} - {self.bucket}"
+
+    @classmethod
+    def for_window(cls, level, time_granularity, start_date=None, end_date=None, site=None):
+        """Rollup rows for a level, granularity and optional site/date window"""
+        queryset = cls.objects.filter(level=level, time_granularity=time_granularity)
+        if site:
+            queryset = queryset.filter(site=site)
+        if start_date:
+            queryset = queryset.filter(bucket__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(bucket__lte=end_date)
+        return queryset.order_by('bucket', 'site')
+
+    @classmethod
+    def covers(cls, level, time_granularity, start_date, end_date, site=None):
+        """
+        Whether rollups hold every bucket in [start_date, end_date) for a
+        level, granularity and optional site
         
-        # Call the original save method
-        super().save(*args, **kwargs)
+        The window is capped at the current bucket; a gap anywhere in it,
+        or a last bucket the ingest hasn't rolled up yet, means the rollups
+        can't answer the window.
+        """
+        step = timedelta(hours=1) if time_granularity == 'hour' else timedelta(days=1)
+        first = _aware(start_date).replace(minute=0, second=0, microsecond=0)
+        if time_granularity == 'day':
+            first = first.replace(hour=0)
+        stop = min(_aware(end_date), timezone.now())
+        if stop <= first:
+            return False
+        expected = -(-(stop - first) // step)
+        
+        queryset = cls.objects.filter(
+            level=level, time_granularity=time_granularity, bucket__gte=first, bucket__lt=stop
+        )
+        if site:
+            queryset = queryset.filter(site=site)
+        return queryset.values('bucket').distinct().order_by().count() >= expected
+
+    @classmethod
+    def rebuild(cls, start_date, end_date, sites=None):
+        """
+        Recompute every rollup bucket overlapping [start_date, end_date]
+        
+        The window is widened to whole days so day buckets are always built
+        from complete data. Site rollups are limited to ``sites`` when given;
+        network rollups always cover every site.
+        
+        Returns:
+            int: Number of rollup rows written
+        """
+        day_start = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        day_end = end_date.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        base = NetworkPerformance.objects.filter(
+            is_active=True,
+            metrics_date_local__gte=day_start,
+            metrics_date_local__lt=day_end,
+        )
+        
+        aggregates = {
+            field: Sum(field) if field in SUMMED_METRIC_FIELDS else Avg(field)
+            for field in METRIC_FIELDS
+        }
+        rollups = []
+        for time_granularity, trunc in (('hour', TruncHour), ('day', TruncDay)):
+            for level in ('network', 'site'):
+                queryset = base
+                group_by = ['bucket']
+                if level == 'site':
+                    group_by.append('site')
+                    if sites:
+                        queryset = queryset.filter(site__in=sites)
+                
+                rows = queryset.annotate(
+                    bucket=trunc('metrics_date_local')
+                ).values(*group_by).annotate(
+                    sample_count=Count('id'), **aggregates
+                ).order_by()
+                
+                for row in rows:
+                    rollups.append(cls(
+                        level=level,
+                        time_granularity=time_granularity,
+                        site=row.get('site', ''),
+                        **{key: value for key, value in row.items() if key != 'site'}
+                    ))
+        
+        if rollups:
+            cls.objects.bulk_create(
+                rollups,
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=['level', 'time_granularity', 'site', 'bucket'],
+                update_fields=['sample_count', *METRIC_FIELDS, 'updated_at'],
+            )
+        return len(rollups)
+
+
+class IngestionWatermark(models.Model):
+    """
+    Latest metrics_date_local successfully stored per source and site, so
+    each ingest run only asks Starburst for newer rows
+    """
+    source = models.CharField(max_length=50)
+    site = models.CharField(max_length=100, blank=True, default='')  # Empty for all sites
+    watermark = models.DateTimeField()
+    last_rows_fetched = models.IntegerField(default=0)
+    last_rows_new = models.IntegerField(default=0)  # Inserted, not updated, by the last run
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'site'], name='unique_ingestion_watermark'),
+        ]
+        verbose_name = 'Ingestion Watermark'
+        verbose_name_plural = 'Ingestion Watermarks'
+
+    def __str__(self):
+        return f"{self.source} - {self.site or 'all sites'} - {self.watermark}"
+
+    @classmethod
+    def get_watermark(cls, source, site=None):
+        """Return the stored watermark as a naive datetime, or None before the first run"""
+        watermark = cls.objects.filter(source=source, site=site or '').values_list('watermark', flat=True).first()
+        if watermark is not None and timezone.is_aware(watermark):
+            watermark = timezone.make_naive(watermark)
+        return watermark
+
+    @classmethod
+    def advance(cls, source, site, watermark, rows_fetched=0, rows_new=0):
+        """Move the watermark forward (never backwards) and record run counters"""
+        if timezone.is_naive(watermark):
+            watermark = timezone.make_aware(watermark)
+        
+        current = cls.objects.filter(source=source, site=site or '').first()
+        if current is not None and current.watermark > watermark:
+            watermark = current.watermark
+        
+        cls.objects.update_or_create(
+            source=source,
+            site=site or '',
+            defaults={
+                'watermark': watermark,
+                'last_rows_fetched': rows_fetched,
+                'last_rows_new': rows_new,
+            },
+        )
+
+
+class Alert(models.Model):
+    """
+    A threshold breach of one metric on one cell
+    
+    Alerts are evaluated at ingest time (see alerts.AlertScan) and again
+    after a threshold profile change (see tasks.reevaluate_alerts).
+    There is at most one open alert per site, cell and metric: later
+    breaches update it, and it is closed once a newer sample of the cell is
+    back within the thresholds.
+    """
+    SEVERITY_CHOICES = [('critical', 'Critical'), ('warning', 'Warning')]
+    STATUS_CHOICES = [('open', 'Open'), ('closed', 'Closed')]
+
+    site = models.CharField(max_length=100)
+    cell_id = models.CharField(max_length=100)
+    metric = models.CharField(max_length=50)
+    # 'critical' sorts before 'warning', so ordering by severity puts critical first
+    severity = models.CharField(max_length=10, choices=SEVERITY_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='open')
+    value = models.FloatField(null=True)  # Value of the latest breaching sample
+    threshold = models.FloatField()
+    first_seen = models.DateTimeField()  # metrics_date_local of the first breaching sample
+    last_seen = models.DateTimeField()  # metrics_date_local of the latest breaching sample
+    closed_at = models.DateTimeField(null=True, blank=True)  # metrics_date_local of the sample that cleared it
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['site', 'cell_id', 'metric'],
+                condition=models.Q(status='open'),
+                name='unique_open_alert',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'severity', '-last_seen']),
+            models.Index(fields=['site', 'status', '-last_seen']),
+        ]
+        ordering = ['severity', '-last_seen']
+        verbose_name = 'Alert'
+        verbose_name_plural = 'Alerts'
+
+    def __str__(self):
+        return f"{self.severity} {self.metric} - {self.site} - {self.cell_id} ({self.status})"
+
+
+class ThresholdProfile(models.Model):
+    """
+    Alert thresholds for one technology and site class
+    
+    The profile with an empty site_class is the technology's default;
+    class profiles apply to their listed sites and only need the metrics
+    they override. Saving or deleting a profile makes every process
+    rebuild its compiled evaluator (see alerts.get_evaluator) and queues a
+    re-evaluation of recent alerts (see tasks.reevaluate_alerts).
+    """
+    TECHNOLOGY_CHOICES = [('lte', 'LTE'), ('nr', 'NR')]
+    THRESHOLD_TYPES = ('min', 'max')
+
+    name = models.CharField(max_length=100)
+    technology = models.CharField(max_length=10, choices=TECHNOLOGY_CHOICES, default='lte')
+    site_class = models.CharField(max_length=50, blank=True, default='')  # Empty for the default profile
+    sites = models.JSONField(default=list, blank=True)  # Sites in this class
+    # {metric: {'warning': 98.0, 'critical': 95.0, 'type': 'min' or 'max'}}
+    thresholds = models.JSONField(default=dict)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['technology', 'site_class'], name='unique_threshold_profile'),
+        ]
+        ordering = ['technology', 'site_class']
+        verbose_name = 'Threshold Profile'
+        verbose_name_plural = 'Threshold Profiles'
+
+    def __str__(self):
+        return f"{self.technology} - {self.site_class or 'default'} - {self.name}"
+
+    def clean(self):
+        if not isinstance(self.sites, list):
+            raise ValidationError({'sites': "Must be a list of site names"})
+        if not isinstance(self.thresholds, dict):
+            raise ValidationError({'thresholds': "Must map metric names to thresholds"})
+        for metric, threshold in self.thresholds.items():
+            if metric not in METRIC_FIELDS:
+                raise ValidationError({'thresholds': f"Unknown metric '{metric}'"})
+            if not isinstance(threshold, dict) or threshold.get('type') not in self.THRESHOLD_TYPES:
+                raise ValidationError({'thresholds': f"{metric}: type must be 'min' or 'max'"})
+            try:
+                warning, critical = float(threshold['warning']), float(threshold['critical'])
+            except (KeyError, TypeError, ValueError):
+                raise ValidationError({'thresholds': f"{metric}: warning and critical must be numbers"})
+            if (critical > warning) if threshold['type'] == 'min' else (critical < warning):
+                raise ValidationError({'thresholds': f"{metric}: critical must be beyond the warning level"})
+
+@receiver([post_save, post_delete], sender=ThresholdProfile)
+def threshold_profiles_changed(sender, instance, **kwargs):
+    caching.invalidate_thresholds()
+    # Open alerts were evaluated against the old thresholds
+    from .tasks import reevaluate_alerts
+    transaction.on_commit(lambda: reevaluate_alerts.delay(instance.technology))
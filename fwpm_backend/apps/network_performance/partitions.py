@@ -0,0 +1,284 @@
+"""
+PostgreSQL range partitioning of the NetworkPerformance table by
+metrics_date_local, so retention can drop whole partitions instead of
+deleting rows.
+"""
+import logging
+import re
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.db import connection, transaction
+
+from .models import NetworkPerformance
+from . import settings as app_settings
+
+logger = logging.getLogger(__name__)
+
+TABLE = NetworkPerformance._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+LEGACY_TABLE = f"{TABLE}_legacy"
+
+_BOUND_RE = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+def _quote(name):
+    return connection.ops.quote_name(name)
+
+def is_partitioned():
+    """
+    Whether the metrics table is a partitioned table (always False off PostgreSQL)
+    """
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)",
+            [TABLE]
+        )
+        return cursor.fetchone() is not None
+
+def estimated_row_count():
+    """
+    Planner estimate of the metrics table's row count from pg_class.reltuples,
+    summed over its partitions; None off PostgreSQL or before the first ANALYZE
+    """
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT CASE WHEN c.relkind = 'p' THEN (
+                       SELECT SUM(p.reltuples) FILTER (WHERE p.reltuples >= 0)
+                       FROM pg_inherits i JOIN pg_class p ON p.oid = i.inhrelid
+                       WHERE i.inhparent = c.oid
+                   ) ELSE NULLIF(c.reltuples, -1) END
+            FROM pg_class c
+            WHERE c.oid = to_regclass(%s)
+            """,
+            [TABLE]
+        )
+        estimate = cursor.fetchone()[0]
+    return int(estimate) if estimate is not None else None
+
+def partition_bounds(day, interval=None):
+    """
+    Return the (start, end) UTC bounds of the partition holding ``day``
+
+    Weekly partitions start on Monday.
+    """
+    interval = interval or app_settings.PARTITION_INTERVAL
+    if isinstance(day, datetime):
+        day = day.astimezone(dt_timezone.utc).date() if day.tzinfo else day.date()
+    if interval == 'week':
+        day -= timedelta(days=day.weekday())
+        length = timedelta(weeks=1)
+    elif interval == 'day':
+        length = timedelta(days=1)
+    else:
+        raise ValueError(f"Unsupported partition interval: {interval}")
+    start = datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+    return start, start + length
+
+def partition_name(start):
+    return f"{TABLE}_p{start:%Y%m%d}"
+
+def list_partitions():
+    """
+    Return (name, start, end) for every range partition, oldest first
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(%s)
+            """,
+            [TABLE]
+        )
+        rows = cursor.fetchall()
+
+    partitions = []
+    for name, bound in rows:
+        match = _BOUND_RE.search(bound or '')
+        if match:  # skips the DEFAULT partition
+            start, end = (datetime.fromisoformat(value) for value in match.groups())
+            partitions.append((name, start, end))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+def ensure_partitions(start_date, end_date, interval=None):
+    """
+    Create any missing partitions covering start_date..end_date (inclusive)
+
+    Rows that already landed in the DEFAULT partition for a missing range
+    are moved into the new partition, since PostgreSQL refuses to add a
+    partition for a range the DEFAULT partition holds rows of.
+
+    Returns the names of the partitions that were created.
+    """
+    existing = {name for name, _, _ in list_partitions()}
+    created = []
+    start, end = partition_bounds(start_date, interval)
+    last_start, _ = partition_bounds(end_date, interval)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [DEFAULT_PARTITION])
+        has_default = cursor.fetchone()[0]
+        while start <= last_start:
+            name = partition_name(start)
+            if name not in existing:
+                _create_partition(cursor, name, start, end, has_default)
+                created.append(name)
+            start, end = end, end + (end - start)
+
+    if created:
+        logger.info(f"Created metrics partitions: {', '.join(created)}")
+    return created
+
+def _create_partition(cursor, name, start, end, has_default):
+    table, partition, default = _quote(TABLE), _quote(name), _quote(DEFAULT_PARTITION)
+    with transaction.atomic():
+        if has_default:
+            # Keep ingest from routing more rows of this range into DEFAULT
+            cursor.execute(f"LOCK TABLE {default} IN SHARE ROW EXCLUSIVE MODE")
+            cursor.execute(
+                f"SELECT EXISTS (SELECT 1 FROM {default} "
+                f"WHERE metrics_date_local >= %s AND metrics_date_local < %s)",
+                [start, end]
+            )
+            has_default = cursor.fetchone()[0]
+        if not has_default:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {partition} PARTITION OF {table} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [start, end]
+            )
+            return
+
+        cursor.execute(f"CREATE TABLE {partition} (LIKE {table} INCLUDING DEFAULTS)")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {default} "
+            f"WHERE metrics_date_local >= %s AND metrics_date_local < %s RETURNING *) "
+            f"INSERT INTO {partition} SELECT * FROM moved",
+            [start, end]
+        )
+        moved = cursor.rowcount
+        cursor.execute(f"ALTER TABLE {table} ATTACH PARTITION {partition} FOR VALUES FROM (%s) TO (%s)", [start, end])
+    logger.warning(f"Moved {moved} metrics rows from {DEFAULT_PARTITION} into {name}")
+
+def drop_partitions_before(cutoff, action=None):
+    """
+    Drop (or detach) every partition whose upper bound is at or before cutoff
+
+    Rows in the partition straddling the cutoff are kept until the whole
+    partition ages out, so retention is rounded up to the partition interval.
+    Rows older than cutoff in the DEFAULT partition are deleted either way.
+    """
+    action = action or app_settings.PARTITION_RETENTION_ACTION
+    if cutoff.tzinfo is None:
+        cutoff = cutoff.replace(tzinfo=dt_timezone.utc)
+
+    removed = []
+    with connection.cursor() as cursor:
+        for name, _, end in list_partitions():
+            if end > cutoff:
+                break
+            cursor.execute(f"ALTER TABLE {_quote(TABLE)} DETACH PARTITION {_quote(name)}")
+            if action == 'drop':
+                cursor.execute(f"DROP TABLE {_quote(name)}")
+            removed.append(name)
+
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [DEFAULT_PARTITION])
+        if cursor.fetchone()[0]:
+            cursor.execute(
+                f"DELETE FROM {_quote(DEFAULT_PARTITION)} WHERE metrics_date_local < %s", [cutoff]
+            )
+            if cursor.rowcount:
+                logger.info(f"Deleted {cursor.rowcount} old metrics rows from {DEFAULT_PARTITION}")
+
+    if removed:
+        logger.info(f"{'Dropped' if action == 'drop' else 'Detached'} metrics partitions: {', '.join(removed)}")
+    return removed
+
+def convert_to_partitioned(interval=None, days_ahead=None, keep_legacy=False):
+    """
+    Rebuild the metrics table as a range-partitioned table
+
+    The existing table is renamed to ``<table>_legacy``, a partitioned
+    table with the same columns, constraints and indexes takes its name,
+    partitions are created for the existing data plus ``days_ahead`` days,
+    and all rows are copied across. This runs in a single transaction and
+    holds an exclusive lock on the table for its duration, so schedule it
+    in a maintenance window.
+    """
+    days_ahead = app_settings.PARTITION_PRECREATE_DAYS if days_ahead is None else days_ahead
+    table, legacy = _quote(TABLE), _quote(LEGACY_TABLE)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+
+        # Secondary index definitions, captured before their names are freed
+        cursor.execute(
+            """
+            SELECT i.relname, pg_get_indexdef(i.oid)
+            FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid
+            WHERE x.indrelid = to_regclass(%s)
+              AND NOT x.indisprimary
+              AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.oid)
+            """,
+            [TABLE]
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            """
+            SELECT conname, contype, pg_get_constraintdef(oid)
+            FROM pg_constraint
+            WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'u')
+            """,
+            [TABLE]
+        )
+        constraints = cursor.fetchall()
+        unique_constraints = [(name, definition) for name, kind, definition in constraints if kind == 'u']
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [TABLE])
+        legacy_sequence = cursor.fetchone()[0]
+
+        cursor.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+        for name, _ in indexes:
+            cursor.execute(f"ALTER INDEX {_quote(name)} RENAME TO {_quote(_legacy_name(name))}")
+        for name, _, _ in constraints:
+            cursor.execute(f"ALTER TABLE {legacy} RENAME CONSTRAINT {_quote(name)} TO {_quote(_legacy_name(name))}")
+
+        # The partition key has to be part of every unique constraint
+        cursor.execute(
+            f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING STORAGE, "
+            f"PRIMARY KEY (id, metrics_date_local)) PARTITION BY RANGE (metrics_date_local)"
+        )
+        sequence = _quote(f"{TABLE}_id_seq")
+        if legacy_sequence and legacy_sequence.split('.')[-1].strip('"') == f"{TABLE}_id_seq":
+            # Free the sequence name for the new table
+            cursor.execute(f"ALTER SEQUENCE {legacy_sequence} RENAME TO {_quote(_legacy_name(f'{TABLE}_id_seq'))}")
+        cursor.execute(f"CREATE SEQUENCE {sequence} OWNED BY {table}.id")
+        cursor.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{TABLE}_id_seq')")
+        for name, definition in unique_constraints:
+            cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {_quote(name)} {definition}")
+        for name, definition in indexes:
+            cursor.execute(re.sub(r" ON \S+ USING ", f" ON {table} USING ", definition, count=1))
+        cursor.execute(f"CREATE TABLE {_quote(DEFAULT_PARTITION)} PARTITION OF {table} DEFAULT")
+
+        cursor.execute(f"SELECT min(metrics_date_local), max(metrics_date_local), max(id) FROM {legacy}")
+        first, last, max_id = cursor.fetchone()
+        now = datetime.now(dt_timezone.utc)
+        ensure_partitions(first or now, max(last or now, now) + timedelta(days=days_ahead), interval)
+
+        cursor.execute(f"INSERT INTO {table} SELECT * FROM {legacy}")
+        copied = cursor.rowcount
+        if max_id:
+            cursor.execute("SELECT setval(%s, %s)", [f"{TABLE}_id_seq", max_id])
+
+        if not keep_legacy:
+            cursor.execute(f"DROP TABLE {legacy}")
+
+    logger.info(f"Converted {TABLE} to a partitioned table ({copied} rows copied)")
+    return copied
+
+def _legacy_name(name):
+    # Postgres identifiers are limited to 63 bytes
+    return f"{name[:56]}_legacy"
@@ -0,0 +1,141 @@
+"""
+Renderers for tabular (time-series) responses
+
+``ColumnarJSONRenderer`` sends each column once as a list,
+``{"columns": [...], "data": {column: [...]}}``, instead of repeating
+every column name in every row. ``ArrowStreamRenderer`` and
+``ParquetRenderer`` send the same table as Arrow IPC stream or Parquet;
+they are only offered when pyarrow is installed.
+
+Views can hand these renderers a DataFrame so the table never goes
+through per-row dicts. Lists of records and the usual envelopes
+(``{'data': ...}`` or paginated ``{'results': ...}``) are accepted too;
+the remaining envelope fields are kept next to the columns in JSON and
+stored as schema metadata in Arrow/Parquet.
+"""
+import json
+
+import pandas as pd
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Envelope keys that may hold the table, in order of preference
+TABLE_KEYS = ('results', 'data')
+
+# Schema metadata key for the envelope in Arrow/Parquet payloads
+ENVELOPE_METADATA_KEY = b'fwpm.envelope'
+
+def split_table(data):
+    """
+    Split response data into its table and envelope
+
+    Returns:
+        tuple: (DataFrame or None, envelope dict, key the table was under or None)
+    """
+    if isinstance(data, pd.DataFrame):
+        return data, {}, None
+    if isinstance(data, list):
+        return pd.DataFrame.from_records(data), {}, None
+    if isinstance(data, dict):
+        for key in TABLE_KEYS:
+            table = data.get(key)
+            if isinstance(table, (pd.DataFrame, list)):
+                if isinstance(table, list):
+                    table = pd.DataFrame.from_records(table)
+                return table, {name: value for name, value in data.items() if name != key}, key
+    return None, data, None
+
+def _column_values(series):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.dt.strftime('%Y-%m-%d %H:%M:%S').where(series.notna(), None).tolist()
+    if series.hasnans:
+        return series.astype(object).where(series.notna(), None).tolist()
+    return series.tolist()
+
+def columnar(df):
+    """``{"columns": [...], "data": {column: [...]}}`` for a DataFrame"""
+    columns = [str(column) for column in df.columns]
+    return {
+        'columns': columns,
+        'data': {name: _column_values(df[column]) for name, column in zip(columns, df.columns)},
+    }
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """
+    JSON with one list per column instead of one object per row
+    """
+    media_type = 'application/vnd.fwpm.columnar+json'
+    format = 'columnar'
+    tabular = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        table, envelope, key = split_table(data)
+        if table is not None:
+            data = {**envelope, key: columnar(table)} if key else columnar(table)
+        return super().render(data, accepted_media_type, renderer_context)
+
+
+class ArrowStreamRenderer(BaseRenderer):
+    """
+    Arrow IPC stream of the response table (requires pyarrow)
+    """
+    media_type = 'application/vnd.apache.arrow.stream'
+    format = 'arrow'
+    charset = None
+    render_style = 'binary'
+    tabular = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        table = self.to_arrow(data)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    @staticmethod
+    def to_arrow(data):
+        """
+        Arrow table for response data; bodies without a table (such as
+        errors) become a single row of their fields
+        """
+        df, envelope, _ = split_table(data)
+        if df is not None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        elif isinstance(envelope, dict):
+            table, envelope = pa.Table.from_pylist([envelope]), {}
+        else:
+            table = pa.table({})
+        if envelope:
+            table = table.replace_schema_metadata({
+                **(table.schema.metadata or {}),
+                ENVELOPE_METADATA_KEY: json.dumps(envelope, default=str).encode(),
+            })
+        return table
+
+
+class ParquetRenderer(BaseRenderer):
+    """
+    Parquet file of the response table (requires pyarrow)
+    """
+    media_type = 'application/vnd.apache.parquet'
+    format = 'parquet'
+    charset = None
+    render_style = 'binary'
+    tabular = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        sink = pa.BufferOutputStream()
+        pq.write_table(ArrowStreamRenderer.to_arrow(data), sink)
+        return sink.getvalue().to_pybytes()
+
+
+# Renderers offered by the time-series endpoints; plain JSON stays the default
+TIME_SERIES_RENDERERS = [JSONRenderer, ColumnarJSONRenderer]
+if pa is not None:
+    TIME_SERIES_RENDERERS += [ArrowStreamRenderer, ParquetRenderer]
@@ -3,24 +3,53 @@ from django.conf import settings
 # Cache settings
 CACHE_TIMEOUT = getattr(settings, 'NETWORK_PERF_CACHE_TIMEOUT', 3600)  # 1 hour
 CACHE_PREFIX = getattr(settings, 'NETWORK_PERF_CACHE_PREFIX', 'network_perf')
+L1_CACHE_MAX_BYTES = getattr(settings, 'NETWORK_PERF_L1_CACHE_MAX_BYTES', 64 * 1024 * 1024)  # per process
+L1_CACHE_TTL = getattr(settings, 'NETWORK_PERF_L1_CACHE_TTL', 60)  # upper bound on in-process lifetime
+SINGLE_FLIGHT_WAIT_TIMEOUT = getattr(settings, 'NETWORK_PERF_SINGLE_FLIGHT_WAIT_TIMEOUT', 30)  # seconds a follower waits for the leader
+SINGLE_FLIGHT_LOCK_TIMEOUT = getattr(settings, 'NETWORK_PERF_SINGLE_FLIGHT_LOCK_TIMEOUT', 330)  # longer than QUERY_TIMEOUT
+STALE_TTL = getattr(settings, 'NETWORK_PERF_STALE_TTL', 86400)  # how long a previous value may be served
+REFRESH_TOP_N = getattr(settings, 'NETWORK_PERF_REFRESH_TOP_N', 50)  # hottest entries kept warm per endpoint
+REFRESH_AHEAD_SECONDS = getattr(settings, 'NETWORK_PERF_REFRESH_AHEAD_SECONDS', 120)  # rebuild entries this close to expiry
+FRAGMENT_TTL = getattr(settings, 'NETWORK_PERF_FRAGMENT_TTL', 86400)  # per-day fragments of closed days
+TODAY_FRAGMENT_TTL = getattr(settings, 'NETWORK_PERF_TODAY_FRAGMENT_TTL', 300)  # today, days still receiving late rows, empty days
+DEFAULT_WINDOW_DAYS = getattr(settings, 'NETWORK_PERF_DEFAULT_WINDOW_DAYS', 7)  # window used when no start_date is given
 
 # Query settings
 MAX_QUERY_DAYS = getattr(settings, 'NETWORK_PERF_MAX_QUERY_DAYS', 31)
-CHUNK_SIZE = getattr(settings, 'NETWORK_PERF_CHUNK_SIZE', 1000)
-DB_BATCH_SIZE = getattr(settings, 'NETWORK_PERF_DB_BATCH_SIZE', 100)
+CHUNK_SIZE = getattr(settings, 'NETWORK_PERF_CHUNK_SIZE', 1000)  # rows per COPY buffer flush / ORM chunk
+DB_BATCH_SIZE = getattr(settings, 'NETWORK_PERF_DB_BATCH_SIZE', 100)  # rows per INSERT in 'orm' load mode
+LOAD_MODE = getattr(settings, 'NETWORK_PERF_LOAD_MODE', 'copy')  # 'copy' (PostgreSQL only) or 'orm'
 
 # Celery task settings
 METRICS_RETENTION_DAYS = getattr(settings, 'NETWORK_PERF_RETENTION_DAYS', 90)
 FETCH_METRICS_RETRY_DELAY = getattr(settings, 'NETWORK_PERF_FETCH_RETRY_DELAY', 300)  # 5 minutes
 MAX_RETRIES = getattr(settings, 'NETWORK_PERF_MAX_RETRIES', 3)
+CLEANUP_BATCH_SIZE = getattr(settings, 'NETWORK_PERF_CLEANUP_BATCH_SIZE', 10000)  # rows per retention DELETE
+CLEANUP_BATCH_SLEEP = getattr(settings, 'NETWORK_PERF_CLEANUP_BATCH_SLEEP', 0.1)  # seconds between DELETE batches
+
+# Partitioning settings (PostgreSQL only, see partitions.py)
+PARTITION_INTERVAL = getattr(settings, 'NETWORK_PERF_PARTITION_INTERVAL', 'day')  # 'day' or 'week'
+PARTITION_PRECREATE_DAYS = getattr(settings, 'NETWORK_PERF_PARTITION_PRECREATE_DAYS', 7)
+PARTITION_RETENTION_ACTION = getattr(settings, 'NETWORK_PERF_PARTITION_RETENTION_ACTION', 'drop')  # or 'detach' to archive
+
+# Ingestion settings
+INGEST_LOOKBACK_HOURS = getattr(settings, 'NETWORK_PERF_INGEST_LOOKBACK_HOURS', 3)  # re-read for late-arriving data
+INGEST_INITIAL_DAYS = getattr(settings, 'NETWORK_PERF_INGEST_INITIAL_DAYS', 1)  # window for the first run
+
+# Alert settings
+ALERT_REEVALUATE_HOURS = getattr(settings, 'NETWORK_PERF_ALERT_REEVALUATE_HOURS', 24)  # window re-checked after a threshold change
 
 # Pagination settings
 PAGE_SIZE = getattr(settings, 'NETWORK_PERF_PAGE_SIZE', 50)
 MAX_PAGE_SIZE = getattr(settings, 'NETWORK_PERF_MAX_PAGE_SIZE', 1000)
+LIST_PAGINATION = getattr(settings, 'NETWORK_PERF_LIST_PAGINATION', 'cursor')  # 'cursor' or 'page' (COUNT(*) + OFFSET)
+LIST_ESTIMATED_COUNT = getattr(settings, 'NETWORK_PERF_LIST_ESTIMATED_COUNT', True)  # pg_class.reltuples estimate with cursor pages
 
 # Starburst connection pool settings
 POOL_SIZE = getattr(settings, 'NETWORK_PERF_POOL_SIZE', 10)
 POOL_TIMEOUT = getattr(settings, 'NETWORK_PERF_POOL_TIMEOUT', 30)
+POOL_IDLE_CHECK_SECONDS = getattr(settings, 'NETWORK_PERF_POOL_IDLE_CHECK_SECONDS', 60)  # validate only after this much idle time
+POOL_MAX_LIFETIME = getattr(settings, 'NETWORK_PERF_POOL_MAX_LIFETIME', 1800)  # 30 minutes
 QUERY_TIMEOUT = getattr(settings, 'NETWORK_PERF_QUERY_TIMEOUT', 300)  # 5 minutes
 
 # Redis settings
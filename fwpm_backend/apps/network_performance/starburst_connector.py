@@ -1,15 +1,21 @@
 import os
+import re
+import numpy as np
 import pandas as pd
 import logging
 import trino
+import requests
 from contextlib import contextmanager
 import ssl
 import certifi
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from functools import lru_cache
 import time
 import threading
+from datetime import timedelta
 from django.conf import settings
+from . import settings as app_settings
+from . import caching
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, 
@@ -28,8 +34,8 @@ STARBURST_CONFIG = {
 }
 
 # Connection pool configuration
-MAX_POOL_SIZE = int(os.environ.get('STARBURST_MAX_POOL_SIZE', 10))
-connection_pool = []
+MAX_POOL_SIZE = int(os.environ.get('STARBURST_MAX_POOL_SIZE', app_settings.POOL_SIZE))
+connection_pools = {}
 pool_lock = threading.Lock()
 
 class QueryTimeoutError(Exception):
@@ -44,6 +50,10 @@ class ConnectionError(Exception):
     """Custom exception for connection errors"""
     pass
 
+class QueryCancelledError(Exception):
+    """Custom exception for queries cancelled before completion"""
+    pass
+
 # Sample dummy data for LTE metrics
 DUMMY_LTE_DATA = [
     {
@@ -170,6 +180,271 @@ DUMMY_NR_DATA = [
     }
 ]
 
+class _SharedSSLContextAdapter(requests.adapters.HTTPAdapter):
+    """HTTP adapter that hands one pre-built SSL context to every TLS connection"""
+    
+    def __init__(self, ssl_context, **kwargs):
+        self._ssl_context = ssl_context
+        super().__init__(**kwargs)
+    
+    def build_connection_pool_key_attributes(self, request, verify, cert=None):
+        host_params, pool_kwargs = super().build_connection_pool_key_attributes(request, verify, cert)
+        pool_kwargs['ssl_context'] = self._ssl_context
+        pool_kwargs.pop('ca_certs', None)
+        pool_kwargs.pop('ca_cert_dir', None)
+        return host_params, pool_kwargs
+
+class _PooledConnection:
+    """A Starburst connection plus the bookkeeping the pool needs"""
+    
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+class StarburstConnectionPool:
+    """
+    Bounded pool of Starburst connections
+    
+    At most ``max_open`` connections exist at once; checkouts beyond that
+    block until a connection is returned or ``checkout_timeout`` passes.
+    Idle connections are only validated with ``SELECT 1`` when they have
+    been idle longer than ``idle_check_after`` seconds, and connections
+    older than ``max_lifetime`` seconds are recycled. New connections are
+    dialled outside the pool lock and share one SSL context.
+    """
+    
+    def __init__(self, db_config, max_open=None, checkout_timeout=None,
+                 idle_check_after=None, max_lifetime=None, request_timeout=None):
+        self.db_config = db_config
+        self.max_open = max_open or MAX_POOL_SIZE
+        self.checkout_timeout = checkout_timeout or app_settings.POOL_TIMEOUT
+        self.idle_check_after = idle_check_after if idle_check_after is not None else app_settings.POOL_IDLE_CHECK_SECONDS
+        self.max_lifetime = max_lifetime if max_lifetime is not None else app_settings.POOL_MAX_LIFETIME
+        self.request_timeout = request_timeout or app_settings.POOL_TIMEOUT
+        
+        self._idle = []
+        self._open = 0
+        self._in_use = 0
+        self._condition = threading.Condition()
+        self._ssl_context = self._create_ssl_context()
+        self._stats = {
+            'checkouts': 0,
+            'created': 0,
+            'evicted': 0,
+            'validations': 0,
+            'timeouts': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+        }
+    
+    def _create_ssl_context(self):
+        """Build the SSL context once for all connections in this pool"""
+        if self.db_config.get('http_scheme') != 'https':
+            return None
+        
+        ssl_context = ssl.create_default_context(cafile=certifi.where())
+        if not self.db_config.get('verify', True):
+            ssl_context.check_hostname = False
+            ssl_context.verify_mode = ssl.CERT_NONE
+        return ssl_context
+    
+    def _connect(self):
+        """Dial a new connection; called without holding the pool lock"""
+        db_config = self.db_config
+        session = requests.Session()
+        auth = None
+        if self._ssl_context is not None:
+            session.verify = self._ssl_context.verify_mode != ssl.CERT_NONE
+            session.mount('https://', _SharedSSLContextAdapter(self._ssl_context))
+            # Credentials are only sent over https
+            if db_config.get('password'):
+                auth = trino.auth.BasicAuthentication(
+                    db_config['user'], 
+                    db_config.get('password', '')
+                )
+        
+        conn = trino.dbapi.connect(
+            host=db_config['host'],
+            port=db_config['port'],
+            user=db_config['user'],
+            catalog=db_config['catalog'],
+            http_scheme=db_config.get('http_scheme', 'http'),
+            auth=auth,
+            http_session=session,
+            request_timeout=self.request_timeout
+        )
+        
+        with self._condition:
+            self._stats['created'] += 1
+        return _PooledConnection(conn)
+    
+    def _is_alive(self, entry):
+        """Run a cheap round trip to check an idle connection"""
+        with self._condition:
+            self._stats['validations'] += 1
+        try:
+            cursor = entry.conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            return True
+        except Exception:
+            return False
+    
+    def _close(self, entry):
+        try:
+            entry.conn.close()
+        except Exception:
+            pass
+    
+    def acquire(self, timeout=None):
+        """
+        Check out a connection, blocking while the pool is at capacity
+        
+        Args:
+            timeout (float): Seconds to wait for a free slot
+        
+        Returns:
+            _PooledConnection: Checked out connection
+        
+        Raises:
+            ConnectionPoolError: If no connection became available in time
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        
+        with self._condition:
+            while True:
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._open < self.max_open:
+                    # Reserve a slot; the connection is dialled outside the lock
+                    self._open += 1
+                    entry = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise ConnectionPoolError(
+                        f"Timed out after {timeout}s waiting for a Starburst connection "
+                        f"({self._open} open, max {self.max_open})"
+                    )
+                self._condition.wait(remaining)
+            
+            waited = time.monotonic() - start
+            self._in_use += 1
+            self._stats['checkouts'] += 1
+            self._stats['wait_time_total'] += waited
+            self._stats['wait_time_max'] = max(self._stats['wait_time_max'], waited)
+        
+        try:
+            if entry is not None:
+                now = time.monotonic()
+                if now - entry.created_at > self.max_lifetime:
+                    self._evict(entry, keep_slot=True)
+                    entry = None
+                elif now - entry.last_used > self.idle_check_after and not self._is_alive(entry):
+                    self._evict(entry, keep_slot=True)
+                    entry = None
+            
+            if entry is None:
+                entry = self._connect()
+        except Exception:
+            with self._condition:
+                self._open -= 1
+                self._in_use -= 1
+                self._condition.notify()
+            raise
+        
+        return entry
+    
+    def _evict(self, entry, keep_slot=False):
+        self._close(entry)
+        with self._condition:
+            self._stats['evicted'] += 1
+            if not keep_slot:
+                self._open -= 1
+                self._condition.notify()
+    
+    def release(self, entry, discard=False):
+        """Return a connection to the pool, closing it if broken or expired"""
+        expired = time.monotonic() - entry.created_at > self.max_lifetime
+        if discard or expired:
+            self._close(entry)
+        
+        with self._condition:
+            self._in_use -= 1
+            if discard or expired:
+                self._open -= 1
+                self._stats['evicted'] += 1
+            else:
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+            self._condition.notify()
+    
+    @contextmanager
+    def connection(self, timeout=None):
+        """Context manager yielding a checked out trino connection"""
+        entry = self.acquire(timeout)
+        discard = False
+        try:
+            yield entry.conn
+        except (trino.exceptions.TrinoConnectionError, ConnectionError):
+            # Transport or authentication problems: don't hand this one out again
+            discard = True
+            raise
+        finally:
+            self.release(entry, discard=discard)
+    
+    def metrics(self):
+        """Snapshot of pool usage counters"""
+        with self._condition:
+            metrics = dict(self._stats)
+            metrics.update({
+                'open': self._open,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'max_open': self.max_open,
+            })
+        metrics['wait_time_avg'] = metrics['wait_time_total'] / metrics['checkouts'] if metrics['checkouts'] else 0.0
+        return metrics
+    
+    def close(self):
+        """Close all idle connections"""
+        with self._condition:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._condition.notify_all()
+        for entry in idle:
+            self._close(entry)
+
+def _pool_key(db_config):
+    return tuple(db_config.get(key) for key in ('host', 'port', 'http_scheme', 'user', 'catalog', 'verify'))
+
+def get_pool(db_config=None):
+    """Return the shared pool for a Starburst configuration, creating it on first use"""
+    if db_config is None:
+        db_config = STARBURST_CONFIG.copy()
+    
+    key = _pool_key(db_config)
+    with pool_lock:
+        pool = connection_pools.get(key)
+        if pool is None:
+            pool = StarburstConnectionPool(db_config)
+            connection_pools[key] = pool
+    return pool
+
+def get_pool_metrics():
+    """Usage counters for every Starburst pool, keyed by host:port/user"""
+    with pool_lock:
+        pools = list(connection_pools.values())
+    return {
+        f"{pool.db_config['host']}:{pool.db_config['port']}/{pool.db_config['user']}": pool.metrics()
+        for pool in pools
+    }
+
 @contextmanager
 def get_connection_from_pool(db_config=None, timeout=30):
     """
@@ -177,82 +452,121 @@ def get_connection_from_pool(db_config=None, timeout=30):
     
     Args:
         db_config (dict): Database configuration
-        timeout (int): Connection timeout in seconds
+        timeout (int): Seconds to wait for a connection when the pool is at capacity
     
     Yields:
         trino.dbapi.Connection: Database connection
     
     Raises:
         ConnectionPoolError: If unable to get a connection
-        QueryTimeoutError: If connection times out
     """
-    if db_config is None:
-        db_config = STARBURST_CONFIG.copy()
+    with get_pool(db_config).connection(timeout) as conn:
+        yield conn
+
+class QueryMonitor:
+    """
+    Deadline and cancellation control for a running Starburst query
     
-    conn = None
-    start_time = time.time()
+    Instead of polling the cursor, a timer fires once at the deadline and
+    cancels the query server-side. The same monitor can be cancelled from
+    another thread (execute_queries does so when a sibling query fails),
+    and several queries can share one deadline by passing the same
+    ``deadline``.
+    """
     
-    try:
-        with pool_lock:
-            # Try to get an existing connection from the pool
-            while len(connection_pool) > 0:
-                conn = connection_pool.pop()
-                try:
-                    # Test if connection is still valid
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT 1")
-                    break
-                except Exception:
-                    conn.close()
-                    conn = None
-                
-                if time.time() - start_time > timeout:
-                    raise QueryTimeoutError("Timeout while waiting for connection")
-            
-            # Create new connection if none available
-            if conn is None:
-                # Create SSL context if using https
-                if db_config.get('http_scheme') == 'https':
-                    ssl_context = ssl.create_default_context(cafile=certifi.where())
-                    if not db_config.get('verify', True):
-                        ssl_context.check_hostname = False
-                        ssl_context.verify_mode = ssl.CERT_NONE
-                else:
-                    ssl_context = None
-                
-                conn = trino.dbapi.connect(
-                    host=db_config['host'],
-                    port=db_config['port'],
-                    user=db_config['user'],
-                    catalog=db_config['catalog'],
-                    http_scheme=db_config.get('http_scheme', 'http'),
-                    auth=trino.auth.BasicAuthentication(
-                        db_config['user'], 
-                        db_config.get('password', '')
-                    ),
-                    ssl=ssl_context,
-                    request_timeout=timeout
-                )
+    def __init__(self, timeout=300, deadline=None):
+        self.deadline = deadline if deadline is not None else time.monotonic() + timeout
+        self.reason = None
+        self._cursor = None
+        self._finished = False
+        self._lock = threading.Lock()
+        self._timer = None
+    
+    @property
+    def remaining(self):
+        """Seconds left before the deadline"""
+        return max(self.deadline - time.monotonic(), 0)
+    
+    def attach(self, cursor):
+        """Start watching the query that will run on ``cursor``"""
+        with self._lock:
+            self._cursor = cursor
+            cancelled = self.reason is not None
         
-        yield conn
+        if cancelled:
+            _cancel_cursor(cursor)
+            return
         
-        # Return connection to pool if still valid
-        try:
-            cursor = conn.cursor()
-            cursor.execute("SELECT 1")
-            with pool_lock:
-                if len(connection_pool) < MAX_POOL_SIZE:
-                    connection_pool.append(conn)
-                    conn = None
-        except Exception:
-            pass
-            
-    finally:
-        if conn:
-            try:
-                conn.close()
-            except Exception:
-                pass
+        self._timer = threading.Timer(self.remaining, self.cancel, kwargs={'reason': 'timeout'})
+        self._timer.daemon = True
+        self._timer.start()
+    
+    def cancel(self, reason='cancelled'):
+        """Cancel the query server-side; safe to call from any thread"""
+        with self._lock:
+            if self._finished or self.reason is not None:
+                return
+            self.reason = reason
+            cursor = self._cursor
+        
+        logger.warning(f"Cancelling Starburst query ({reason})")
+        if cursor is not None:
+            _cancel_cursor(cursor)
+    
+    def finish(self):
+        """Mark the query as done and stop the deadline timer"""
+        with self._lock:
+            self._finished = True
+        if self._timer is not None:
+            self._timer.cancel()
+    
+    def check(self):
+        """
+        Raise if the query was cancelled or ran past its deadline
+        
+        Raises:
+            QueryTimeoutError: If the deadline passed
+            QueryCancelledError: If the query was cancelled
+        """
+        if self.reason == 'timeout':
+            raise QueryTimeoutError("Query execution exceeded its deadline")
+        if self.reason is not None:
+            raise QueryCancelledError(f"Query was cancelled ({self.reason})")
+        if time.monotonic() > self.deadline:
+            self.cancel(reason='timeout')
+            raise QueryTimeoutError("Query execution exceeded its deadline")
+
+def _cancel_cursor(cursor):
+    """Cancel the query running on a cursor, ignoring failures"""
+    try:
+        cursor.cancel()
+    except Exception as e:
+        logger.warning(f"Failed to cancel Starburst query: {str(e)}")
+
+_TEMPLATE_BLOCK = re.compile(r'{%\s*if\s+(\w+)\s*%}(.*?){%\s*endif\s*%}', re.S)
+_PLACEHOLDER = re.compile(r'%\((\w+)\)s')
+
+def prepare_query(query, params=None):
+    """
+    Render a query template for the Trino client
+    
+    Templates keep ``{% if NAME %}...{% endif %}`` blocks only when
+    parameter NAME is set, and use ``%(NAME)s`` placeholders. The Trino
+    DB-API only binds positional ``?`` parameters, so each placeholder is
+    replaced in order and its value appended to the returned list.
+    
+    Returns:
+        tuple: (query, list of parameter values)
+    """
+    params = params or {}
+    query = _TEMPLATE_BLOCK.sub(lambda match: match.group(2) if params.get(match.group(1)) else '', query)
+    values = []
+    
+    def bind(match):
+        values.append(params[match.group(1)])
+        return '?'
+    
+    return _PLACEHOLDER.sub(bind, query), values
 
 @lru_cache(maxsize=128)
 def get_query_template(query_type):
@@ -263,112 +577,166 @@ def get_query_template(query_type):
         return NR_QUERY
     raise ValueError(f"Unknown query type: {query_type}")
 
-def execute_query(query, params=None, db_config=None, timeout=300):
+# Number of rows pulled from the cursor per batch when streaming results
+FETCH_BATCH_SIZE = int(os.environ.get('STARBURST_FETCH_BATCH_SIZE', 10000))
+
+# Trino type prefixes that can be materialised straight into float columns
+FLOAT_TYPE_PREFIXES = ('double', 'real', 'decimal')
+INTEGER_TYPE_PREFIXES = ('bigint', 'integer', 'smallint', 'tinyint')
+
+def _rows_to_frame(rows, columns, type_codes):
     """
-    Execute a query on Starburst Enterprise with enhanced error handling and performance optimizations
+    Build a typed DataFrame from a batch of result rows
+    
+    Rows are transposed once into column tuples and each column is converted
+    to its final dtype directly, so the batch never goes through an
+    object-typed intermediate DataFrame.
+    
+    Args:
+        rows (list): Result rows as returned by cursor.fetchmany
+        columns (list): Column names
+        type_codes (list): Trino type names from cursor.description
+    
+    Returns:
+        pandas.DataFrame: Batch with datetime and downcast numeric columns
+    """
+    if not rows:
+        return pd.DataFrame(columns=columns)
+    
+    data = {}
+    for name, type_code, values in zip(columns, type_codes, zip(*rows)):
+        type_code = (type_code or '').lower()
+        try:
+            if type_code.startswith(FLOAT_TYPE_PREFIXES):
+                # None becomes NaN during the float conversion
+                data[name] = np.asarray(values, dtype=np.float64).astype(np.float32)
+            elif type_code.startswith(INTEGER_TYPE_PREFIXES):
+                data[name] = pd.to_numeric(pd.Series(values), downcast='integer')
+            elif name == 'metrics_date_local':
+                data[name] = pd.to_datetime(pd.Series(values))
+            else:
+                data[name] = pd.Series(values, dtype=object)
+        except Exception as e:
+            logger.warning(f"Failed to convert column {name} ({type_code}): {str(e)}")
+            data[name] = pd.Series(values, dtype=object)
+    
+    return pd.DataFrame(data, columns=columns)
+
+def execute_query_iter(query, params=None, db_config=None, timeout=300, batch_size=FETCH_BATCH_SIZE, monitor=None):
+    """
+    Execute a query on Starburst Enterprise and stream the results as typed batches
+    
+    Each batch is converted to a DataFrame with the memory optimised dtypes
+    applied as soon as it is fetched, so the full result set is never held
+    as a list of Python rows.
+    
+    Rows are fetched as soon as Starburst returns the first page. If the
+    consumer closes the generator before the last batch, the query is
+    cancelled server-side. Views collect every batch before responding, so
+    a client disconnecting mid-request does not cancel the query; the
+    deadline does.
     
     Args:
         query (str): SQL query to execute
         params (dict): Query parameters
         db_config (dict): Database configuration
         timeout (int): Query timeout in seconds
+        batch_size (int): Number of rows per yielded batch
+        monitor (QueryMonitor): Deadline/cancellation control; defaults to a
+            new monitor enforcing ``timeout``
     
-    Returns:
-        pandas.DataFrame: Query results
+    Yields:
+        pandas.DataFrame: Query results, one batch at a time. A single empty
+        DataFrame carrying the column names is yielded when the query
+        returns no rows.
     
     Raises:
         QueryTimeoutError: If query execution times out
+        QueryCancelledError: If the query is cancelled through its monitor
         ValueError: If query parameters are invalid
         ConnectionError: If database connection fails
     """
     if db_config is None:
         db_config = STARBURST_CONFIG.copy()
+    if monitor is None:
+        monitor = QueryMonitor(timeout)
     
-    start_time = time.time()
-    logger.info(f"Starting query execution with timeout {timeout}s")
+    logger.info(f"Starting query execution with timeout {monitor.remaining:.0f}s")
     
     try:
-        with get_connection_from_pool(db_config, timeout=30) as conn:
-            # Create cursor and execute query with timeout
+        with get_connection_from_pool(db_config, timeout=min(30, monitor.remaining)) as conn:
+            # Create cursor and arm the deadline before the query is submitted
             cursor = conn.cursor()
-            
-            # Log query execution start
-            logger.info("Executing query with parameters: %s", 
-                       {k: v for k, v in (params or {}).items() if not k.lower().startswith('password')})
+            monitor.attach(cursor)
+            completed = False
             
             try:
-                cursor.execute(query, params)
-            except Exception as e:
-                logger.error("Query execution failed: %s", str(e))
-                if "Invalid credentials" in str(e):
-                    raise ConnectionError("Authentication failed. Please check your credentials.")
-                elif "Table not found" in str(e):
-                    raise ValueError(f"Table not found: {str(e)}")
-                elif "Syntax error" in str(e):
-                    raise ValueError(f"SQL syntax error: {str(e)}")
-                raise
-            
-            # Monitor query execution time
-            while not cursor.finished:
-                if time.time() - start_time > timeout:
-                    cursor.cancel()  # Cancel the running query
-                    raise QueryTimeoutError(f"Query execution exceeded timeout of {timeout} seconds")
-                time.sleep(1)
-            
-            # Get column names
-            if cursor.description is None:
-                logger.warning("Query returned no results")
-                return pd.DataFrame()
+                # Log query execution start
+                logger.info("Executing query with parameters: %s", 
+                           {k: v for k, v in (params or {}).items() if not k.lower().startswith('password')})
                 
-            columns = [desc[0] for desc in cursor.description]
-            
-            # Fetch results in chunks for memory efficiency
-            chunk_size = 10000
-            results = []
-            total_rows = 0
-            
-            try:
-                while True:
-                    chunk = cursor.fetchmany(chunk_size)
-                    if not chunk:
-                        break
-                    results.extend(chunk)
-                    total_rows += len(chunk)
-                    logger.debug(f"Fetched {total_rows} rows so far")
+                # execute() returns as soon as the first page of results is available
+                try:
+                    cursor.execute(*prepare_query(query, params))
+                except Exception as e:
+                    monitor.check()
+                    logger.error("Query execution failed: %s", str(e))
+                    if "Invalid credentials" in str(e):
+                        raise ConnectionError("Authentication failed. Please check your credentials.")
+                    elif "Table not found" in str(e):
+                        raise ValueError(f"Table not found: {str(e)}")
+                    elif "Syntax error" in str(e):
+                        raise ValueError(f"SQL syntax error: {str(e)}")
+                    raise
+                monitor.check()
+                
+                # Get column names
+                if cursor.description is None:
+                    logger.warning("Query returned no results")
+                    completed = True
+                    return
                     
-                    # Check if we're still within timeout
-                    if time.time() - start_time > timeout:
-                        raise QueryTimeoutError(f"Data fetching exceeded timeout of {timeout} seconds")
-            except Exception as e:
-                logger.error(f"Error fetching results: {str(e)}")
-                raise
-            
-            logger.info(f"Query completed successfully. Total rows: {total_rows}")
-            
-            # Convert to pandas DataFrame
-            df = pd.DataFrame(results, columns=columns)
-            
-            # Convert metrics_date_local to datetime
-            if 'metrics_date_local' in df.columns:
+                columns = [desc[0] for desc in cursor.description]
+                type_codes = [desc[1] for desc in cursor.description]
+                total_rows = 0
+                
                 try:
-                    df['metrics_date_local'] = pd.to_datetime(df['metrics_date_local'])
+                    while True:
+                        chunk = cursor.fetchmany(batch_size)
+                        monitor.check()
+                        if not chunk:
+                            break
+                        total_rows += len(chunk)
+                        logger.debug(f"Fetched {total_rows} rows so far")
+                        
+                        yield _rows_to_frame(chunk, columns, type_codes)
+                except (QueryTimeoutError, QueryCancelledError):
+                    raise
+                except GeneratorExit:
+                    logger.info("Result consumer stopped early, cancelling query")
+                    raise
                 except Exception as e:
-                    logger.warning(f"Failed to convert metrics_date_local to datetime: {str(e)}")
-            
-            # Optimize memory usage
-            try:
-                for col in df.select_dtypes(include=['float64']).columns:
-                    df[col] = pd.to_numeric(df[col], downcast='float')
-                for col in df.select_dtypes(include=['int64']).columns:
-                    df[col] = pd.to_numeric(df[col], downcast='integer')
-            except Exception as e:
-                logger.warning(f"Failed to optimize DataFrame memory usage: {str(e)}")
-            
-            return df
+                    monitor.check()
+                    logger.error(f"Error fetching results: {str(e)}")
+                    raise
+                
+                if total_rows == 0:
+                    yield _rows_to_frame([], columns, type_codes)
+                
+                completed = True
+                logger.info(f"Query completed successfully. Total rows: {total_rows}")
+            finally:
+                monitor.finish()
+                if not completed:
+                    # Timed out, failed or abandoned: stop Starburst working on it
+                    _cancel_cursor(cursor)
             
     except QueryTimeoutError as e:
         logger.error("Query timeout: %s", str(e))
         raise
+    except QueryCancelledError as e:
+        logger.warning("Query cancelled: %s", str(e))
+        raise
     except ValueError as e:
         logger.error("Invalid query parameters: %s", str(e))
         raise
@@ -379,8 +747,142 @@ def execute_query(query, params=None, db_config=None, timeout=300):
         logger.error("Unexpected error executing query: %s", str(e), exc_info=True)
         raise
 
+def execute_query(query, params=None, db_config=None, timeout=300, monitor=None):
+    """
+    Execute a query on Starburst Enterprise with enhanced error handling and performance optimizations
+    
+    Convenience wrapper around execute_query_iter for callers that need the
+    whole result set at once.
+    
+    Args:
+        query (str): SQL query to execute
+        params (dict): Query parameters
+        db_config (dict): Database configuration
+        timeout (int): Query timeout in seconds
+        monitor (QueryMonitor): Optional deadline/cancellation control
+    
+    Returns:
+        pandas.DataFrame: Query results
+    
+    Raises:
+        QueryTimeoutError: If query execution times out
+        QueryCancelledError: If the query is cancelled through its monitor
+        ValueError: If query parameters are invalid
+        ConnectionError: If database connection fails
+    """
+    batches = list(execute_query_iter(query, params, db_config=db_config, timeout=timeout, monitor=monitor))
+    if not batches:
+        return pd.DataFrame()
+    if len(batches) == 1:
+        return batches[0]
+    return pd.concat(batches, ignore_index=True)
+
+# Shared worker threads for running independent queries concurrently
+_query_executor = ThreadPoolExecutor(max_workers=MAX_POOL_SIZE, thread_name_prefix='starburst-query')
+
+def execute_queries(queries, db_config=None, timeout=300, return_exceptions=False):
+    """
+    Execute several queries on Starburst Enterprise concurrently
+    
+    All queries share one deadline, so the overall latency is that of the
+    slowest query rather than the sum. If any query fails, the others are
+    cancelled server-side and the first error is raised, unless
+    ``return_exceptions`` is set: then each failure is returned in place of
+    its result and the other queries run to completion.
+    
+    Args:
+        queries (dict): Mapping of name to (query, params)
+        db_config (dict): Database configuration
+        timeout (int): Deadline in seconds shared by all queries
+        return_exceptions (bool): Return failures instead of raising
+    
+    Returns:
+        dict: Mapping of name to pandas.DataFrame results (or the exception
+        the query raised, with ``return_exceptions``)
+    
+    Raises:
+        QueryTimeoutError: If the shared deadline passes
+        ValueError: If query parameters are invalid
+        ConnectionError: If database connection fails
+    """
+    deadline = time.monotonic() + timeout
+    monitors = {name: QueryMonitor(deadline=deadline) for name in queries}
+    futures = {
+        _query_executor.submit(
+            execute_query, query, params, db_config=db_config, monitor=monitors[name]
+        ): name
+        for name, (query, params) in queries.items()
+    }
+    
+    results = {}
+    try:
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                logger.warning(f"Starburst query {name} failed: {str(e)}")
+                results[name] = e
+    except Exception:
+        for monitor in monitors.values():
+            monitor.cancel(reason='sibling query failed')
+        raise
+    
+    return results
+
+def fetch_metric_days(query_type, site, start_date, end_date, db_config=None, timeout=300):
+    """
+    LTE or NR metrics for ``site`` over the whole days
+    ``start_date``..``end_date``, newest first
+    
+    Results are cached per (site, technology, day), so overlapping windows
+    (7, 14 and 31 days for the same site) only query Starburst for the
+    days not already cached, one query per run of consecutive missing days.
+    Closed days stay cached for FRAGMENT_TTL and today for
+    TODAY_FRAGMENT_TTL (see caching.compose_days).
+    
+    Args:
+        query_type (str): 'LTE' or 'NR'
+        site (str): Site identifier
+        start_date (datetime): First day of the window
+        end_date (datetime): Last day of the window (included entirely)
+        db_config (dict): Database configuration
+        timeout (int): Timeout in seconds for each Starburst query
+    
+    Returns:
+        pandas.DataFrame: Metrics with NaN replaced by 0 and datetimes
+        formatted as 'YYYY-MM-DD HH:MM:SS'; empty when there is no data
+    """
+    query = get_query_template(query_type)
+    
+    def fetch(first_day, last_day):
+        # BETWEEN is inclusive; rows at the next midnight are dropped by compose_day_frames
+        params = {
+            'SITE': site,
+            'StartDate': first_day.strftime('%Y-%m-%d'),
+            'EndDate': (last_day + timedelta(days=1)).strftime('%Y-%m-%d')
+        }
+        batches = []
+        for df in execute_query_iter(query, params, db_config=db_config, timeout=timeout):
+            if df.empty:
+                continue
+            df = df.fillna(0)
+            for col in df.select_dtypes(include=['datetime']).columns:
+                df[col] = df[col].dt.strftime('%Y-%m-%d %H:%M:%S')
+            batches.append(df)
+        return pd.concat(batches, ignore_index=True) if batches else None
+    
+    # Starburst is upstream of ingest, so its fragments don't follow the
+    # site generations bumped by every ingest run
+    return caching.compose_day_frames(
+        f"{query_type.lower()}_day", ('frame',), start_date, end_date, fetch, 'metrics_date_local',
+        site=site, generational=False, newest_first=True,
+    )
+
 # Updated LTE query with proper datetime handling and hierarchical structure
-LTE_QUERY = """
+_LTE_BASE_METRICS = """
     WITH base_metrics AS (
         SELECT 
             metrics_date_local,
@@ -428,7 +930,7 @@ LTE_QUERY = """
             AVG(handover_prep_success_rate_inter) as handover_prep_success_rate_inter,
             AVG(handover_exec_success_rate_inter) as handover_exec_success_rate_inter
         FROM network_performance.lte_metrics
-        WHERE metrics_date_local BETWEEN TIMESTAMP %(StartDate)s AND TIMESTAMP %(EndDate)s
+        WHERE metrics_date_local BETWEEN CAST(%(StartDate)s AS TIMESTAMP) AND CAST(%(EndDate)s AS TIMESTAMP)
         {% if SITE %}
             AND site = %(SITE)s
         {% endif %}
@@ -437,11 +939,29 @@ LTE_QUERY = """
         {% endif %}
         GROUP BY metrics_date_local, site, cell_id
     )
+"""
+
+LTE_QUERY = _LTE_BASE_METRICS + """
     SELECT *
     FROM base_metrics
     ORDER BY metrics_date_local DESC
 """
 
+# One keyset page of LTE_QUERY rows: ordered by the natural key, resuming
+# after the AFTER_* row, so Starburst stops after LIMIT rows instead of
+# producing the whole window
+LTE_PAGE_QUERY = _LTE_BASE_METRICS + """
+    SELECT *
+    FROM base_metrics
+    {% if AFTER_DATE %}
+    WHERE metrics_date_local > CAST(%(AFTER_DATE)s AS TIMESTAMP)
+        OR (metrics_date_local = CAST(%(AFTER_DATE)s AS TIMESTAMP)
+            AND (site > %(AFTER_SITE)s OR (site = %(AFTER_SITE)s AND cell_id > %(AFTER_CELL)s)))
+    {% endif %}
+    ORDER BY metrics_date_local, site, cell_id
+    LIMIT %(LIMIT)s
+"""
+
 # NR query template
 NR_QUERY = """
 SELECT 
@@ -532,5 +1052,12 @@ LEFT JOIN
 ON 
     appian.nsoc_site_code = SUBSTRING(pm.gutran_cell_id, 1, 15)
 WHERE 
-    pm.dt >= cast(date_format(current_date - interval '<Parameters.Days>' day, '%Y%m%d') AS integer)
-""" 
\ No newline at end of file
+    pm.metrics_date_local BETWEEN CAST(%(StartDate)s AS TIMESTAMP) AND CAST(%(EndDate)s AS TIMESTAMP)
+    -- dt is the yyyymmdd partition column; bounding it lets Starburst prune partitions
+    AND pm.dt BETWEEN cast(date_format(CAST(%(StartDate)s AS TIMESTAMP), '%Y%m%d') AS integer)
+        AND cast(date_format(CAST(%(EndDate)s AS TIMESTAMP), '%Y%m%d') AS integer)
+    {% if SITE %}
+    AND appian.site_name = %(SITE)s
+    {% endif %}
+ORDER BY pm.metrics_date_local DESC
+""" 
@@ -1,25 +1,203 @@
+import csv
+import io
 import logging
+import operator
+import time
 from celery import shared_task
-from django.core.cache import cache
-from django.db import transaction
+from django.db import connection, models, transaction
+from django.utils import timezone
 from datetime import datetime, timedelta
+from functools import reduce
 import pandas as pd
-from .models import NetworkPerformance
-from .starburst_connector import execute_query, LTE_QUERY, NR_QUERY
+from itertools import repeat
+from .models import Alert, NetworkPerformance, NetworkPerformanceRollup, IngestionWatermark, METRIC_FIELDS, NATURAL_KEY_FIELDS
+from . import settings as app_settings
+from . import partitions
+from . import alerts, caching
+from .starburst_connector import execute_query_iter, LTE_QUERY, NR_QUERY
 
 logger = logging.getLogger(__name__)
 
+# Watermark source name for the LTE ingest
+WATERMARK_SOURCE = 'lte'
+
+# NetworkPerformance fields loaded from the Starburst LTE columns of the same name
+INGEST_FIELDS = ('metrics_date_local', 'site', 'cell_id') + METRIC_FIELDS
+INTEGER_FIELDS = {
+    field.name for field in NetworkPerformance._meta.concrete_fields
+    if isinstance(field, models.IntegerField)
+}
+
+def _metric_columns(df):
+    """
+    Return one Python list per INGEST_FIELDS column with NaN/NaT mapped to None
+
+    Conversion is done column-wise so no per-row Series is ever built;
+    columns missing from the frame come back as all-None.
+    """
+    columns = []
+    for field in INGEST_FIELDS:
+        if field not in df.columns:
+            columns.append([None] * len(df))
+            continue
+        series = df[field]
+        if field in INTEGER_FIELDS and pd.api.types.is_float_dtype(series):
+            # Integer counters arrive as floats when the column has nulls
+            series = series.round().astype('Int64')
+        values = series.to_numpy(dtype=object)
+        nulls = series.isna().to_numpy()
+        if nulls.any():
+            values = values.copy()
+            values[nulls] = None
+        columns.append(values.tolist())
+    return columns
+
+def _build_metric_instances(df):
+    """
+    Build unsaved NetworkPerformance instances for a DataFrame of LTE rows
+    """
+    # Positional construction in concrete field order skips Django's
+    # per-kwarg lookups; fields that aren't ingested keep their defaults
+    columns = dict(zip(INGEST_FIELDS, _metric_columns(df)))
+    ordered = [
+        columns.get(field.attname) or repeat(field.get_default(), len(df))
+        for field in NetworkPerformance._meta.concrete_fields
+    ]
+    return [NetworkPerformance(*row) for row in zip(*ordered)]
+
+def _store_metrics_batch(df, chunk_size=None):
+    """
+    Store a batch of LTE metrics rows in the database
+    
+    Uses COPY into a staging table when LOAD_MODE is 'copy' and the
+    database is PostgreSQL, otherwise falls back to bulk_create.
+    
+    Returns:
+        int: Number of rows inserted rather than updated
+    """
+    chunk_size = chunk_size or app_settings.CHUNK_SIZE
+    # A row may only be upserted once per statement, so keep the last copy
+    # of any natural key repeated within the batch
+    df = df.drop_duplicates(subset=list(NATURAL_KEY_FIELDS), keep='last')
+    if app_settings.LOAD_MODE == 'copy' and connection.vendor == 'postgresql':
+        return _copy_metrics_batch(df, chunk_size)
+    return _orm_metrics_batch(df, chunk_size)
+
+def _count_stored_keys(metrics):
+    """
+    Count the instances whose natural key is already stored
+    
+    Filters on the exact (metrics_date_local, site, cell_id) tuples, OR'd
+    DB_BATCH_SIZE keys per query, so rows that only share a date, site or
+    cell with the batch are never counted.
+    """
+    keys = [{field: getattr(metric, field) for field in NATURAL_KEY_FIELDS} for metric in metrics]
+    stored = 0
+    for i in range(0, len(keys), app_settings.DB_BATCH_SIZE):
+        condition = reduce(operator.or_, (models.Q(**key) for key in keys[i:i+app_settings.DB_BATCH_SIZE]))
+        stored += NetworkPerformance.objects.filter(condition).count()
+    return stored
+
+def _orm_metrics_batch(df, chunk_size):
+    """
+    Upsert rows with bulk_create, one transaction per chunk
+    
+    bulk_create can't tell inserts from updates, so the chunk's keys that
+    are already stored are counted first; every other row is an insert.
+    """
+    inserted = 0
+    # Process data in chunks to avoid memory issues
+    for i in range(0, len(df), chunk_size):
+        metrics = _build_metric_instances(df.iloc[i:i+chunk_size])
+
+        # Bulk create metrics
+        with transaction.atomic():
+            stored = _count_stored_keys(metrics)
+            NetworkPerformance.objects.bulk_create(
+                metrics,
+                batch_size=app_settings.DB_BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=NATURAL_KEY_FIELDS,
+                update_fields=METRIC_FIELDS + ('updated_at',)
+            )
+        inserted += len(metrics) - stored
+    return inserted
+
+def _copy_metrics_batch(df, chunk_size):
+    """
+    Stream rows into a temporary staging table with COPY FROM STDIN and
+    upsert them into NetworkPerformance with a single INSERT ... SELECT
+    
+    The CSV buffer is flushed every ``chunk_size`` rows so memory stays
+    bounded; the whole batch is loaded in one transaction. Inserted rows
+    are told apart from updated ones by ``xmax = 0`` in RETURNING.
+    """
+    table = connection.ops.quote_name(NetworkPerformance._meta.db_table)
+    columns = ', '.join(connection.ops.quote_name(field) for field in INGEST_FIELDS)
+    
+    # Naive timestamps are stored in the default timezone, as the ORM does
+    dates = df['metrics_date_local']
+    if dates.dt.tz is None:
+        df = df.assign(metrics_date_local=dates.dt.tz_localize(timezone.get_default_timezone()))
+    
+    with transaction.atomic(), connection.cursor() as cursor:
+        # ON COMMIT DROP only fires on the outermost commit, so clear any
+        # staging table left by an earlier batch in the same transaction
+        cursor.execute("DROP TABLE IF EXISTS network_performance_staging")
+        cursor.execute(
+            f"CREATE TEMP TABLE network_performance_staging ON COMMIT DROP AS "
+            f"SELECT {columns} FROM {table} WITH NO DATA"
+        )
+        copy_sql = (
+            f"COPY network_performance_staging ({columns}) "
+            f"FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        )
+        for i in range(0, len(df), chunk_size):
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in zip(*_metric_columns(df.iloc[i:i+chunk_size])):
+                writer.writerow(['\\N' if value is None else value for value in row])
+            buffer.seek(0)
+            cursor.copy_expert(copy_sql, buffer)
+        
+        conflict_columns = ', '.join(connection.ops.quote_name(field) for field in NATURAL_KEY_FIELDS)
+        updates = ', '.join(
+            f"{name} = EXCLUDED.{name}"
+            for name in map(connection.ops.quote_name, METRIC_FIELDS + ('updated_at',))
+        )
+        cursor.execute(
+            f"WITH merged AS ("
+            f"INSERT INTO {table} ({columns}, created_at, updated_at, is_active) "
+            f"SELECT {columns}, now(), now(), true FROM network_performance_staging "
+            f"ON CONFLICT ({conflict_columns}) DO UPDATE SET {updates} "
+            f"RETURNING (xmax = 0) AS inserted"
+            f") SELECT count(*) FILTER (WHERE inserted), count(*) FROM merged"
+        )
+        inserted, merged = cursor.fetchone()
+        logger.debug(f"Merged {merged} of {len(df)} staged metrics rows ({inserted} inserted)")
+    return inserted
+
 @shared_task(bind=True, max_retries=3)
 def fetch_and_store_metrics(self, start_date=None, end_date=None, site=None):
     """
     Fetch metrics from Starburst and store in database
+    
+    Without an explicit start_date only rows newer than the stored
+    ingestion watermark (minus INGEST_LOOKBACK_HOURS for late data) are
+    requested, so the 15 minute schedule doesn't re-scan the whole day.
     """
     try:
+        watermark = IngestionWatermark.get_watermark(WATERMARK_SOURCE, site)
+        
         # Set default date range if not provided
         if not start_date:
-            start_date = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+            if watermark is not None:
+                start = watermark - timedelta(hours=app_settings.INGEST_LOOKBACK_HOURS)
+            else:
+                start = datetime.now() - timedelta(days=app_settings.INGEST_INITIAL_DAYS)
+            start_date = start.strftime('%Y-%m-%d %H:%M:%S')
         if not end_date:
-            end_date = datetime.now().strftime('%Y-%m-%d')
+            end_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
         # Prepare query parameters
         params = {
@@ -29,108 +207,196 @@ def fetch_and_store_metrics(self, start_date=None, end_date=None, site=None):
         if site:
             params['SITE'] = site
         
-        # Execute query
-        df = execute_query(LTE_QUERY, params)
+        # Stream query results batch by batch so the full result set is
+        # never held in memory at once
+        total_rows = 0
+        new_rows = 0
+        chunk_size = app_settings.CHUNK_SIZE
+        first_metric_date = last_metric_date = None
+        sites = set()
+        # Each stored batch is checked against the thresholds once, here,
+        # so the alerts endpoint only reads the Alert table
+        alert_scan = alerts.AlertScan('lte')
+        for batch_df in execute_query_iter(LTE_QUERY, params):
+            if batch_df.empty:
+                continue
+            total_rows += len(batch_df)
+            new_rows += _store_metrics_batch(batch_df, chunk_size)
+            alert_scan.add(batch_df)
+            
+            # Track what was touched so only those rollup buckets are rebuilt
+            batch_first = batch_df['metrics_date_local'].min().to_pydatetime()
+            batch_last = batch_df['metrics_date_local'].max().to_pydatetime()
+            first_metric_date = min(first_metric_date or batch_first, batch_first)
+            last_metric_date = max(last_metric_date or batch_last, batch_last)
+            sites.update(batch_df['site'].dropna().unique())
         
-        if df.empty:
+        if total_rows == 0:
             logger.warning(f"No data found for period {start_date} to {end_date}")
-            return
+            return {'rows_fetched': 0, 'rows_new': 0}
         
-        # Process data in chunks to avoid memory issues
-        chunk_size = 1000
-        for i in range(0, len(df), chunk_size):
-            chunk_df = df.iloc[i:i+chunk_size]
-            
-            # Prepare bulk create data
-            metrics = []
-            for _, row in chunk_df.iterrows():
-                metric = NetworkPerformance(
-                    metrics_date_local=row['metrics_date_local'],
-                    site=row['site'],
-                    cell_id=row['cell_id'],
-                    cell_availability=row.get('cell_availability'),
-                    abnormal_release=row.get('abnormal_release'),
-                    erab_retainability=row.get('erab_retainability'),
-                    erab_establishment_attempts=row.get('erab_establishment_attempts'),
-                    erab_establishment_successes=row.get('erab_establishment_successes'),
-                    avg_rrc_conn_ue=row.get('avg_rrc_conn_ue'),
-                    avg_active_ue_dl=row.get('avg_active_ue_dl'),
-                    avg_active_ue_ul=row.get('avg_active_ue_ul'),
-                    dl_cell_capacity=row.get('dl_cell_capacity'),
-                    ul_cell_capacity=row.get('ul_cell_capacity'),
-                    dl_cell_throughput=row.get('dl_cell_throughput'),
-                    ul_cell_throughput=row.get('ul_cell_throughput'),
-                    dl_ue_throughput=row.get('dl_ue_throughput'),
-                    ul_ue_throughput=row.get('ul_ue_throughput'),
-                    pdcp_volume_dl=row.get('pdcp_volume_dl'),
-                    pdcp_volume_ul=row.get('pdcp_volume_ul'),
-                    dl_prb_usage=row.get('dl_prb_usage'),
-                    ul_prb_usage=row.get('ul_prb_usage'),
-                    dl_latency=row.get('dl_latency')
-                )
-                metrics.append(metric)
-            
-            # Bulk create metrics
-            with transaction.atomic():
-                NetworkPerformance.objects.bulk_create(
-                    metrics,
-                    batch_size=100,
-                    ignore_conflicts=True
-                )
+        # Keep the site/network hourly and daily rollups in step with the new rows
+        rollup_count = NetworkPerformanceRollup.rebuild(first_metric_date, last_metric_date, sites=sites)
+        logger.info(f"Rebuilt {rollup_count} rollup rows for {len(sites)} sites")
+        
+        alert_counts = alert_scan.save()
+        logger.info(
+            f"Alerts: {alert_counts['opened']} opened, {alert_counts['updated']} updated, "
+            f"{alert_counts['closed']} closed"
+        )
         
-        # Invalidate relevant caches
-        cache_patterns = [
-            "network_perf:*",
-            f"network_perf:{site}:*" if site else None
-        ]
-        for pattern in cache_patterns:
-            if pattern:
-                cache.delete_pattern(pattern)
+        # Invalidate relevant caches by moving the touched sites to a new generation
+        caching.invalidate_sites(sites)
         
-        logger.info(f"Successfully processed {len(df)} metrics")
-        return len(df)
+        # Only advance the watermark once everything above succeeded
+        IngestionWatermark.advance(
+            WATERMARK_SOURCE, site, last_metric_date,
+            rows_fetched=total_rows, rows_new=new_rows
+        )
+        
+        logger.info(f"Successfully processed {total_rows} metrics ({new_rows} inserted, the rest updated)")
+        return {
+            'rows_fetched': total_rows,
+            'rows_new': new_rows,
+            'watermark': last_metric_date.isoformat(),
+            'alerts': alert_counts,
+        }
         
     except Exception as e:
         logger.error(f"Error in fetch_and_store_metrics: {str(e)}")
         raise self.retry(exc=e)
 
+def _delete_metrics_before(cutoff_date, batch_size=None, sleep=None):
+    """
+    Delete metrics rows older than cutoff_date in small batches
+    
+    Each batch is its own short statement so retention never holds long
+    row locks or produces one huge transaction; on PostgreSQL the batch is
+    picked by ctid so no primary keys pass through Python.
+    """
+    batch_size = batch_size or app_settings.CLEANUP_BATCH_SIZE
+    sleep = app_settings.CLEANUP_BATCH_SLEEP if sleep is None else sleep
+    table = connection.ops.quote_name(NetworkPerformance._meta.db_table)
+    
+    total = 0
+    while True:
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"DELETE FROM {table} WHERE ctid IN ("
+                        f"SELECT ctid FROM {table} WHERE metrics_date_local < %s LIMIT %s)",
+                        [cutoff_date, batch_size]
+                    )
+                    deleted = cursor.rowcount
+            else:
+                ids = list(
+                    NetworkPerformance.objects
+                    .filter(metrics_date_local__lt=cutoff_date)
+                    .values_list('id', flat=True)[:batch_size]
+                )
+                deleted, _ = NetworkPerformance.objects.filter(id__in=ids).delete()
+        
+        total += deleted
+        if deleted < batch_size:
+            return total
+        logger.info(f"Deleted {total} old metrics so far")
+        if sleep:
+            time.sleep(sleep)
+
 @shared_task
-def cleanup_old_metrics(days=90):
+def cleanup_old_metrics(days=90, batch_size=None, sleep=None):
     """
     Remove metrics older than specified days
+    
+    When the metrics table is partitioned whole partitions are dropped
+    instead of deleting rows. Otherwise rows are deleted ``batch_size`` at
+    a time with ``sleep`` seconds between batches (CLEANUP_BATCH_SIZE and
+    CLEANUP_BATCH_SLEEP by default).
     """
     try:
         cutoff_date = datetime.now() - timedelta(days=days)
-        deleted_count = NetworkPerformance.objects.filter(
-            metrics_date_local__lt=cutoff_date
-        ).delete()
+        if partitions.is_partitioned():
+            deleted_count = len(partitions.drop_partitions_before(cutoff_date))
+            logger.info(f"Removed {deleted_count} metrics partitions older than {cutoff_date}")
+        else:
+            deleted_count = _delete_metrics_before(cutoff_date, batch_size=batch_size, sleep=sleep)
+            logger.info(f"Deleted {deleted_count} old metrics")
+        NetworkPerformanceRollup.objects.filter(bucket__lt=cutoff_date).delete()
+        Alert.objects.filter(status='closed', closed_at__lt=cutoff_date).delete()
         
-        logger.info(f"Deleted {deleted_count} old metrics")
         return deleted_count
     except Exception as e:
         logger.error(f"Error in cleanup_old_metrics: {str(e)}")
         raise
 
 @shared_task
-def refresh_cache():
+def create_metric_partitions(days_ahead=None):
+    """
+    Pre-create metrics partitions for the coming days
+    """
+    try:
+        if not partitions.is_partitioned():
+            return []
+        days_ahead = app_settings.PARTITION_PRECREATE_DAYS if days_ahead is None else days_ahead
+        today = datetime.now()
+        return partitions.ensure_partitions(today, today + timedelta(days=days_ahead))
+    except Exception as e:
+        logger.error(f"Error in create_metric_partitions: {str(e)}")
+        raise
+
+@shared_task
+def reevaluate_alerts(technology=WATERMARK_SOURCE, hours=None):
+    """
+    Re-evaluate alerts over the last ``hours`` of stored metrics
+
+    Queued whenever a ThresholdProfile is saved or deleted, so open alerts
+    follow the new thresholds without waiting for fresh samples.
+    """
+    try:
+        if technology != WATERMARK_SOURCE:
+            # NetworkPerformance only holds the LTE ingest
+            return {'opened': 0, 'updated': 0, 'closed': 0}
+        hours = app_settings.ALERT_REEVALUATE_HOURS if hours is None else hours
+        counts = alerts.evaluate_ingested(timezone.now() - timedelta(hours=hours), technology=technology)
+        logger.info(
+            f"Re-evaluated alerts for the last {hours} hours: {counts['opened']} opened, "
+            f"{counts['updated']} updated, {counts['closed']} closed"
+        )
+        return counts
+    except Exception as e:
+        logger.error(f"Error in reevaluate_alerts: {str(e)}")
+        raise
+
+@shared_task
+def refresh_cache(limit=None):
     """
     Refresh commonly accessed cache entries
+    
+    Rebuilds the most requested dashboard summary and hierarchical metrics
+    entries shortly before they expire, so users keep hitting warm cache.
     """
+    # Imported here: the views module pulls in DRF, which workers only
+    # need for this task
+    from .views import NetworkPerformanceViewSet
+    
     try:
-        # Get active sites
-        sites = NetworkPerformance.objects.values_list(
-            'site', flat=True
-        ).distinct()
-        
-        # Refresh cache for each site
-        for site in sites:
-            NetworkPerformance.get_cached_metrics(
-                site=site,
-                start_date=datetime.now() - timedelta(days=7)
+        view = NetworkPerformanceViewSet()
+        refreshed = 0
+        for params in caching.hot_keys('dashboard_summary', limit):
+            cache_key, stale_key, build = view._dashboard_summary_entry(
+                params['site'],
+                datetime.strptime(params['start_date'], '%Y-%m-%d'),
+                datetime.strptime(params['end_date'], '%Y-%m-%d'),
             )
+            refreshed += caching.refresh_ahead(cache_key, build, timeout=300, stale_key=stale_key)
+        
+        for params in caching.hot_keys('hierarchical', limit):
+            cache_key, stale_key, build = view._hierarchical_entry(**params)
+            refreshed += caching.refresh_ahead(cache_key, build, timeout=3600, stale_key=stale_key)
         
-        logger.info(f"Successfully refreshed cache for {len(sites)} sites")
-        return len(sites)
+        logger.info(f"Successfully refreshed {refreshed} hot cache entries")
+        return refreshed
     except Exception as e:
         logger.error(f"Error in refresh_cache: {str(e)}")
-        raise 
\ No newline at end of file
+        raise
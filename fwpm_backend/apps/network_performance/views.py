@@ -2,18 +2,24 @@ from django.shortcuts import render
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Avg, Max, Min
-from .models import NetworkPerformance
+from django.db.models import Avg, Max, Min, Q
+from .models import Alert, NetworkPerformance, NetworkPerformanceRollup, METRIC_FIELDS, SUMMED_METRIC_FIELDS
 from .serializers import NetworkPerformanceSerializer
-from .starburst_connector import execute_query, LTE_QUERY, NR_QUERY
+from . import alerts as alert_engine, caching, partitions, renderers
+from . import settings as app_settings
+from .starburst_connector import (
+    execute_query, execute_queries, fetch_metric_days, get_pool_metrics, LTE_QUERY, LTE_PAGE_QUERY, NR_QUERY
+)
 import logging
 import pandas as pd
 import json
 from datetime import datetime, timedelta
 from django.db.models.functions import TruncDate, TruncHour
-from django.core.cache import cache
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.utils.urls import replace_query_param
 from django.conf import settings
+import base64
 import hashlib
 import random
 
@@ -37,15 +43,151 @@ class CustomPagination(PageNumberPagination):
             'results': data
         })
 
+class KeysetPagination(CustomPagination):
+    """
+    Cursor pagination for rows that are fetched a page at a time
+    
+    The cursor is the sort key of the last row sent. Callers fetch
+    page_size + 1 rows after it; the extra row only signals that another
+    page follows. There is no total count and no previous link.
+    """
+    cursor_query_param = 'cursor'
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            return json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+        except (ValueError, UnicodeDecodeError):
+            raise ValueError('Invalid cursor')
+
+    def encode_cursor(self, key):
+        return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+    def get_keyset_response(self, request, data, next_key):
+        next_link = None
+        if next_key is not None:
+            next_link = replace_query_param(
+                request.build_absolute_uri(), self.cursor_query_param, self.encode_cursor(next_key)
+            )
+        return Response({
+            'links': {
+                'next': next_link,
+                'previous': None
+            },
+            'results': data
+        })
+
+class MetricsCursorPagination(BasePagination):
+    """
+    Cursor pagination over NetworkPerformance rows, newest first
+    
+    Pages are ordered by (-metrics_date_local, -id) and read with a seek
+    predicate on the first or last row of the current page rather than an
+    OFFSET, and no COUNT(*) is issued, so every page costs the same however
+    deep the client scrolls. With LIST_ESTIMATED_COUNT an unfiltered list
+    reports the planner's row estimate (PostgreSQL only) instead of a count.
+    """
+    page_size = app_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = app_settings.MAX_PAGE_SIZE
+    cursor_query_param = 'cursor'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            position = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+            return (datetime.fromisoformat(position['d']), int(position['i'])), bool(position.get('r'))
+        except (ValueError, KeyError, TypeError, UnicodeDecodeError):
+            raise NotFound('Invalid cursor')
+
+    def encode_cursor(self, row, reverse=False):
+        position = {'d': row.metrics_date_local.isoformat(), 'i': row.pk}
+        if reverse:
+            position['r'] = 1
+        token = base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, token)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+        self.unfiltered = not queryset.query.where
+        
+        if reverse:
+            # Previous page: walk up from the first row of the current page
+            queryset = queryset.order_by('metrics_date_local', 'id')
+            if position:
+                # The redundant bound lets PostgreSQL range-scan the date index
+                queryset = queryset.filter(metrics_date_local__gte=position[0]).filter(
+                    Q(metrics_date_local__gt=position[0]) |
+                    Q(metrics_date_local=position[0], id__gt=position[1])
+                )
+        else:
+            queryset = queryset.order_by('-metrics_date_local', '-id')
+            if position:
+                queryset = queryset.filter(metrics_date_local__lte=position[0]).filter(
+                    Q(metrics_date_local__lt=position[0]) |
+                    Q(metrics_date_local=position[0], id__lt=position[1])
+                )
+        
+        # One extra row tells whether there is more in this direction
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+        
+        if reverse:
+            has_next, has_previous = position is not None, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+        self.next_link = self.encode_cursor(rows[-1]) if rows and has_next else None
+        self.previous_link = self.encode_cursor(rows[0], reverse=True) if rows and has_previous else None
+        return rows
+
+    def get_paginated_response(self, data):
+        estimated_count = None
+        if app_settings.LIST_ESTIMATED_COUNT and self.unfiltered:
+            estimated_count = partitions.estimated_row_count()
+        return Response({
+            'links': {
+                'next': self.next_link,
+                'previous': self.previous_link
+            },
+            'estimated_count': estimated_count,
+            'results': data
+        })
+
 class NetworkPerformanceViewSet(viewsets.ModelViewSet):
-    queryset = NetworkPerformance.objects.all().order_by('-metrics_date_local')
+    queryset = NetworkPerformance.objects.all().order_by('-metrics_date_local', '-id')
     serializer_class = NetworkPerformanceSerializer
-    pagination_class = CustomPagination
+    pagination_class = MetricsCursorPagination if app_settings.LIST_PAGINATION == 'cursor' else CustomPagination
 
     def _get_cache_key(self, params):
         """Generate a unique cache key based on request parameters"""
         param_string = json.dumps(params, sort_keys=True)
-        return f"network_perf:{hashlib.md5(param_string.encode()).hexdigest()}"
+        return caching.make_key(
+            'hierarchical', 'frame', hashlib.md5(param_string.encode()).hexdigest(), site=params.get('site')
+        )
+
+    def _table_response_data(self, data):
+        """
+        Tabular renderers take the DataFrame as is; plain JSON gets records
+        """
+        if isinstance(data, pd.DataFrame) and not getattr(self.request.accepted_renderer, 'tabular', False):
+            return data.to_dict(orient='records')
+        return data
 
     def _process_dataframe(self, df):
         """Helper method to process dataframe and handle datetime"""
@@ -71,20 +213,83 @@ class NetworkPerformanceViewSet(viewsets.ModelViewSet):
             if df.empty:
                 return df
 
+            # Counters and volumes add up across cells; everything else is averaged
+            aggregations = {
+                col: 'sum' if col in SUMMED_METRIC_FIELDS else 'mean'
+                for col in df.select_dtypes(include=['float64', 'int64']).columns
+            }
             if level == 'network':
-                return df.groupby('metrics_date_local').agg({
-                    col: 'mean' for col in df.select_dtypes(include=['float64', 'int64']).columns
-                }).reset_index()
+                return df.groupby('metrics_date_local').agg(aggregations).reset_index()
             elif level == 'site':
-                return df.groupby(['metrics_date_local', 'site']).agg({
-                    col: 'mean' for col in df.select_dtypes(include=['float64', 'int64']).columns
-                }).reset_index()
+                return df.groupby(['metrics_date_local', 'site']).agg(aggregations).reset_index()
             else:  # cell level
                 return df
         except Exception as e:
             logger.error(f"Error aggregating data: {str(e)}")
             raise ValueError(f"Error aggregating data: {str(e)}")
 
+    def _get_rollup_metrics(self, level, site, start_date, end_date, time_granularity):
+        """
+        Read network or site level metrics from the rollup table
+        
+        The frame has the same columns and aggregation as the Starburst
+        branch. Returns None when the rollups are missing any bucket of
+        [start_date, end_date) so the caller can fall back to Starburst.
+        """
+        # A network view filtered to one site is that site's rollup
+        rollup_level = 'site' if level == 'site' or site else 'network'
+        if not NetworkPerformanceRollup.covers(rollup_level, time_granularity, start_date, end_date, site=site):
+            return None
+        
+        fields = ['bucket', 'site', *METRIC_FIELDS] if level == 'site' else ['bucket', *METRIC_FIELDS]
+        rows = NetworkPerformanceRollup.for_window(
+            rollup_level, time_granularity, start_date, end_date, site=site
+        ).values_list(*fields)
+        df = pd.DataFrame.from_records(list(rows), columns=fields)
+        if df.empty:
+            return None
+        
+        df = df.rename(columns={'bucket': 'metrics_date_local'})
+        df['metrics_date_local'] = pd.to_datetime(df['metrics_date_local'])
+        metric_columns = list(METRIC_FIELDS)
+        df[metric_columns] = df[metric_columns].astype('float64').fillna(0).round(2)
+        return df
+
+    def _summarize_cells(self, df, cell_column, metrics):
+        """
+        Build per-cell summary dicts with one groupby/agg pass
+        
+        Args:
+            df (pandas.DataFrame): Metrics rows
+            cell_column (str): Column identifying the cell
+            metrics (list): (output_key, source_column, aggregation) tuples.
+                Columns missing from ``df`` are reported as empty strings,
+                numeric aggregates as floats.
+        
+        Returns:
+            list: One dict per cell, in order of first appearance
+        """
+        if df.empty:
+            return []
+        
+        grouped = df.groupby(cell_column, sort=False)
+        aggregations = {
+            key: pd.NamedAgg(column=source, aggfunc=how)
+            for key, source, how in metrics
+            if source in df.columns
+        }
+        summary = grouped.agg(**aggregations)
+        
+        for key, source, how in metrics:
+            if source not in df.columns:
+                summary[key] = ''
+            elif how in ('mean', 'sum'):
+                summary[key] = summary[key].astype('float64')
+        
+        summary = summary[[key for key, _, _ in metrics]]
+        summary.index.name = 'cell_id'
+        return summary.reset_index().to_dict(orient='records')
+
     def _handle_error(self, error, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR):
         """Standardized error handling"""
         error_msg = str(error)
@@ -107,6 +312,376 @@ class NetworkPerformanceViewSet(viewsets.ModelViewSet):
             'timestamp': datetime.now().isoformat()
         }, status=status_code)
 
+    def _build_dashboard_summary(self, site, start_date, end_date):
+        """Build the LTE/NR dashboard summary for a site, falling back to mock data"""
+        # Prepare query parameters
+        params = {
+            'SITE': site,
+            'StartDate': start_date.strftime('%Y-%m-%d'),
+            'EndDate': end_date.strftime('%Y-%m-%d')
+        }
+
+        summary = {'lte': None, 'nr': None}
+        use_mock_data = False
+
+        # Try to get real data from Starburst
+        try:
+            logger.info(f"Attempting to fetch real data from Starburst for site {site}")
+            
+            # Run the LTE and NR queries concurrently under one deadline; a
+            # failure in one technology doesn't cancel or discard the other
+            results = execute_queries({
+                'lte': (LTE_QUERY, params),
+                'nr': (NR_QUERY, params),
+            }, return_exceptions=True)
+            lte_df, nr_df = (
+                pd.DataFrame() if isinstance(result, Exception) else result
+                for result in (results['lte'], results['nr'])
+            )
+            
+            if not lte_df.empty:
+                # Calculate actual days in the dataset
+                actual_days = (lte_df['metrics_date_local'].max() - lte_df['metrics_date_local'].min()).days + 1
+                logger.info(f"Found {actual_days} days of LTE data for site {site}")
+                
+                summary['lte'] = {
+                    'cell_count': len(lte_df['cell_id'].unique()),
+                    'avg_availability': float(lte_df['cell_availability'].mean()),
+                    'avg_dl_throughput': float(lte_df['dl_cell_throughput'].mean()),
+                    'avg_ul_throughput': float(lte_df['ul_cell_throughput'].mean()),
+                    'total_dl_volume': float(lte_df['pdcp_volume_dl'].sum()),
+                    'total_ul_volume': float(lte_df['pdcp_volume_ul'].sum()),
+                    'avg_latency': float(lte_df['dl_latency'].mean()),
+                    'avg_prb_util_dl': float(lte_df['dl_prb_usage'].mean()),
+                    'avg_prb_util_ul': float(lte_df['ul_prb_usage'].mean()),
+                    'cell_metrics': [],
+                    'actual_days': actual_days  # Include actual days in response
+                }
+                
+                # Get cell-specific metrics in a single grouped pass
+                summary['lte']['cell_metrics'] = self._summarize_cells(lte_df, 'cell_id', [
+                    ('availability', 'cell_availability', 'mean'),
+                    ('dl_throughput', 'dl_cell_throughput', 'mean'),
+                    ('ul_throughput', 'ul_cell_throughput', 'mean'),
+                    ('dl_volume', 'pdcp_volume_dl', 'sum'),
+                    ('ul_volume', 'pdcp_volume_ul', 'sum'),
+                    ('latency', 'dl_latency', 'mean'),
+                    ('prb_util_dl', 'dl_prb_usage', 'mean'),
+                    ('prb_util_ul', 'ul_prb_usage', 'mean'),
+                ])
+
+            if not nr_df.empty:
+                # Calculate actual days in the dataset
+                actual_days = (nr_df['metrics_date_local'].max() - nr_df['metrics_date_local'].min()).days + 1
+                logger.info(f"Found {actual_days} days of NR data for site {site}")
+                
+                summary['nr'] = {
+                    'cell_count': len(nr_df['gutran_cell_id'].unique()),
+                    'avg_dl_throughput': float(nr_df['MAC_DL_Thp_Max'].mean()),
+                    'avg_ul_throughput': float(nr_df['MAC_UL_Thp_Max'].mean()),
+                    'total_dl_volume': float(nr_df['DL_Data_Volume'].sum()),
+                    'total_ul_volume': float(nr_df['UL_Data_Volume'].sum()),
+                    'avg_dl_latency': float(nr_df['DL_Latency_Non_DRX_QoS_0'].mean()),
+                    'avg_prb_util_dl': float(nr_df['PRB_Util_DL'].mean()),
+                    'avg_prb_util_ul': float(nr_df['PRB_Util_UL'].mean()),
+                    'cell_metrics': [],
+                    'actual_days': actual_days  # Include actual days in response
+                }
+                
+                # Get cell-specific metrics in a single grouped pass
+                summary['nr']['cell_metrics'] = self._summarize_cells(nr_df, 'gutran_cell_id', [
+                    ('enodeb_name', 'enodeb_name', 'first'),
+                    ('dl_throughput', 'MAC_DL_Thp_Max', 'mean'),
+                    ('ul_throughput', 'MAC_UL_Thp_Max', 'mean'),
+                    ('dl_volume', 'DL_Data_Volume', 'sum'),
+                    ('ul_volume', 'UL_Data_Volume', 'sum'),
+                    ('dl_latency', 'DL_Latency_Non_DRX_QoS_0', 'mean'),
+                    ('prb_util_dl', 'PRB_Util_DL', 'mean'),
+                    ('prb_util_ul', 'PRB_Util_UL', 'mean'),
+                ])
+
+            # If both LTE and NR data are None, use mock data
+            if summary['lte'] is None and summary['nr'] is None:
+                logger.warning("No real data found, falling back to mock data")
+                use_mock_data = True
+
+        except Exception as e:
+            logger.error(f"Error fetching data from Starburst: {str(e)}")
+            logger.info("Falling back to mock data due to Starburst connection error")
+            use_mock_data = True
+
+        # Use mock data if needed
+        if use_mock_data:
+            summary = {
+                'lte': {
+                    'cell_count': 3,
+                    'avg_availability': 99.8,
+                    'avg_dl_throughput': 150.5,
+                    'avg_ul_throughput': 45.2,
+                    'total_dl_volume': 1024.5,
+                    'total_ul_volume': 512.3,
+                    'avg_latency': 25.5,
+                    'avg_prb_util_dl': 65.2,
+                    'avg_prb_util_ul': 45.8,
+                    'actual_days': 1,  # Mock data represents 1 day
+                    'cell_metrics': [
+                        {
+                            'cell_id': 'CELL001',
+                            'availability': 99.9,
+                            'dl_throughput': 155.2,
+                            'ul_throughput': 48.5,
+                            'dl_volume': 350.2,
+                            'ul_volume': 175.1,
+                            'latency': 24.8,
+                            'prb_util_dl': 68.5,
+                            'prb_util_ul': 47.2
+                        },
+                        {
+                            'cell_id': 'CELL002',
+                            'availability': 99.7,
+                            'dl_throughput': 148.3,
+                            'ul_throughput': 43.8,
+                            'dl_volume': 325.8,
+                            'ul_volume': 162.9,
+                            'latency': 25.9,
+                            'prb_util_dl': 63.8,
+                            'prb_util_ul': 44.5
+                        },
+                        {
+                            'cell_id': 'CELL003',
+                            'availability': 99.8,
+                            'dl_throughput': 147.9,
+                            'ul_throughput': 43.2,
+                            'dl_volume': 348.5,
+                            'ul_volume': 174.3,
+                            'latency': 25.8,
+                            'prb_util_dl': 63.2,
+                            'prb_util_ul': 45.7
+                        }
+                    ]
+                },
+                'nr': {
+                    'cell_count': 2,
+                    'avg_dl_throughput': 850.2,
+                    'avg_ul_throughput': 125.5,
+                    'total_dl_volume': 2048.7,
+                    'total_ul_volume': 1024.4,
+                    'avg_dl_latency': 12.5,
+                    'avg_prb_util_dl': 55.8,
+                    'avg_prb_util_ul': 35.2,
+                    'actual_days': 1,  # Mock data represents 1 day
+                    'cell_metrics': [
+                        {
+                            'cell_id': 'NR001',
+                            'enodeb_name': 'eNB001',
+                            'dl_throughput': 875.5,
+                            'ul_throughput': 128.8,
+                            'dl_volume': 1050.2,
+                            'ul_volume': 525.1,
+                            'dl_latency': 12.2,
+                            'prb_util_dl': 57.2,
+                            'prb_util_ul': 36.5
+                        },
+                        {
+                            'cell_id': 'NR002',
+                            'enodeb_name': 'eNB002',
+                            'dl_throughput': 825.8,
+                            'ul_throughput': 122.2,
+                            'dl_volume': 998.5,
+                            'ul_volume': 499.3,
+                            'dl_latency': 12.8,
+                            'prb_util_dl': 54.5,
+                            'prb_util_ul': 33.9
+                        }
+                    ]
+                }
+            }
+            logger.info("Using mock data for dashboard summary")
+        else:
+            logger.info("Using real data from Starburst for dashboard summary")
+
+        return summary
+
+    def _dashboard_summary_entry(self, site, start_date, end_date):
+        """Cache key, stale key and builder for a dashboard summary"""
+        date_parts = (start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+        return (
+            caching.make_key('dashboard_summary', *date_parts, site=site),
+            caching.make_stale_key('dashboard_summary', *date_parts, site=site),
+            lambda: self._build_dashboard_summary(site, start_date, end_date),
+        )
+
+    def _starburst_params(self, start_date, end_date, site=None, cell_id=None):
+        """Starburst query parameters for a date window and optional site/cell"""
+        params = {
+            'StartDate': start_date.strftime('%Y-%m-%d'),
+            'EndDate': end_date.strftime('%Y-%m-%d')
+        }
+        if site:
+            params['SITE'] = site
+        if cell_id:
+            params['CELL_ID'] = cell_id
+        return params
+
+    def _hierarchical_fragment(self, level, site, cell_id, first_day, last_day, time_granularity):
+        """
+        Aggregated hierarchical metric records for the whole days
+        ``first_day``..``last_day``
+        """
+        start_date = datetime.combine(first_day, datetime.min.time())
+        # BETWEEN is inclusive, so this also returns the next day's first
+        # bucket; compose_days drops records outside the requested days
+        end_date = datetime.combine(last_day + timedelta(days=1), datetime.min.time())
+        
+        # Network and site views are served from the ingest-maintained
+        # rollups when they cover the requested window
+        result_df = None
+        if level in ('network', 'site') and not cell_id:
+            result_df = self._get_rollup_metrics(level, site, start_date, end_date, time_granularity)
+        
+        if result_df is None:
+            # Execute query
+            df = execute_query(LTE_QUERY, self._starburst_params(start_date, end_date, site, cell_id))
+            if df.empty:
+                return None
+            
+            # Process dataframe
+            df = self._process_dataframe(df)
+            
+            # Apply time granularity
+            if time_granularity == 'hour':
+                df['metrics_date_local'] = df['metrics_date_local'].dt.floor('H')
+            else:
+                df['metrics_date_local'] = df['metrics_date_local'].dt.floor('D')
+            
+            # Aggregate based on level
+            result_df = self._aggregate_by_level(df, level)
+        
+        # Convert datetime to string for JSON serialization
+        result_df['metrics_date_local'] = result_df['metrics_date_local'].dt.strftime('%Y-%m-%d %H:%M:%S')
+        return result_df
+
+    def _build_hierarchical_metrics(self, level, site, cell_id, start_date, end_date, time_granularity):
+        """
+        Build the hierarchical metrics response body, or None when there is
+        no data for the parameters
+        
+        Buckets never span days, so the window is assembled from per-day
+        fragments shared with every other window that overlaps it.
+        """
+        data = caching.compose_day_frames(
+            'hierarchical_day', ('frame', level, time_granularity, cell_id), start_date, end_date,
+            lambda first_day, last_day: self._hierarchical_fragment(
+                level, site, cell_id, first_day, last_day, time_granularity
+            ),
+            'metrics_date_local',
+            site=site,
+        )
+        if data.empty:
+            return None
+        
+        return {
+            'metadata': {
+                'level': level,
+                'time_granularity': time_granularity,
+                'start_date': start_date.strftime('%Y-%m-%d'),
+                'end_date': end_date.strftime('%Y-%m-%d'),
+                'total_records': len(data)
+            },
+            'data': data
+        }
+
+    def _hierarchical_entry(self, start_date, end_date, level='network', site=None, cell_id=None,
+                            time_granularity='day'):
+        """
+        Cache key, stale key and builder for a hierarchical metrics response;
+        dates may be datetimes or their ISO strings
+        """
+        start_date, end_date = caching.normalize_window(start_date, end_date)
+        params = caching.canonical_params({
+            'level': level,
+            'site': site,
+            'cell_id': cell_id,
+            'start_date': start_date,
+            'end_date': end_date,
+            'time_granularity': time_granularity
+        })
+        param_hash = hashlib.md5(json.dumps(params, sort_keys=True).encode()).hexdigest()
+        return (
+            self._get_cache_key(params),
+            caching.make_stale_key('hierarchical', 'frame', param_hash, site=site),
+            lambda: self._build_hierarchical_metrics(level, site, cell_id, start_date, end_date, time_granularity),
+        )
+
+    def _hierarchical_cell_page(self, site, cell_id, start_date, end_date, time_granularity, after, limit):
+        """
+        One keyset page of cell-level metrics, ordered by time, site and cell
+        
+        The seek predicate and LIMIT run in Starburst, so a page costs one
+        page of rows rather than the whole window.
+        
+        Returns:
+            tuple: (DataFrame, sort key of the last row, or None on the last page)
+        """
+        params = self._starburst_params(start_date, end_date, site, cell_id)
+        params['EndDate'] = (end_date + timedelta(days=1) - timedelta(seconds=1)).strftime('%Y-%m-%d %H:%M:%S')
+        params['LIMIT'] = limit + 1
+        if after:
+            params['AFTER_DATE'], params['AFTER_SITE'], params['AFTER_CELL'] = after
+        df = execute_query(LTE_PAGE_QUERY, params)
+        if df.empty:
+            return df, None
+        
+        next_key = None
+        if len(df) > limit:
+            df = df.iloc[:limit].copy()
+            last = df.iloc[-1]
+            next_key = [
+                pd.Timestamp(last['metrics_date_local']).strftime('%Y-%m-%d %H:%M:%S'),
+                last['site'],
+                last['cell_id'],
+            ]
+        
+        df = self._process_dataframe(df)
+        df['metrics_date_local'] = df['metrics_date_local'].dt.floor('h' if time_granularity == 'hour' else 'D')
+        df['metrics_date_local'] = df['metrics_date_local'].dt.strftime('%Y-%m-%d %H:%M:%S')
+        return df, next_key
+
+    def _hierarchical_cell_response(self, request, site, cell_id, start_date, end_date, time_granularity):
+        """Cell-level hierarchical metrics with keyset pagination"""
+        paginator = KeysetPagination()
+        after = paginator.decode_cursor(request)
+        limit = paginator.get_page_size(request)
+        page_params = caching.canonical_params({
+            'site': site,
+            'cell_id': cell_id,
+            'start_date': start_date,
+            'end_date': end_date,
+            'time_granularity': time_granularity,
+            'after': json.dumps(after) if after else None,
+            'limit': limit,
+        })
+        cache_key = caching.make_key(
+            'hierarchical_page', 'frame',
+            hashlib.md5(json.dumps(page_params, sort_keys=True).encode()).hexdigest(), site=site
+        )
+        
+        def build_page():
+            df, next_key = self._hierarchical_cell_page(
+                site, cell_id, start_date, end_date, time_granularity, after, limit
+            )
+            if df.empty and after is None:
+                return None
+            return {'data': df, 'next': next_key}
+        
+        page = caching.single_flight(cache_key, build_page, timeout=3600)
+        if page is None:
+            return Response({
+                'error': 'No data found for the specified parameters',
+                'parameters': self._starburst_params(start_date, end_date, site, cell_id)
+            }, status=status.HTTP_404_NOT_FOUND)
+        return paginator.get_keyset_response(request, self._table_response_data(page['data']), page['next'])
+
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """Get aggregated network performance statistics"""
@@ -123,7 +698,22 @@ class NetworkPerformanceViewSet(viewsets.ModelViewSet):
         )
         return Response(stats)
     
-    @action(detail=False, methods=['get'], url_path='lte-metrics')
+    @action(detail=False, methods=['get'], url_path='cache-stats')
+    def cache_stats(self, request):
+        """Get cache hit/miss/byte counters per key prefix"""
+        try:
+            return Response(caching.get_cache_stats())
+        except Exception as e:
+            logger.error(f"Error in cache_stats: {str(e)}")
+            return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    
+    @action(detail=False, methods=['get'], url_path='pool-stats')
+    def pool_stats(self, request):
+        """Get Starburst connection pool usage counters per host/user"""
+        return Response(get_pool_metrics())
+    
+    @action(detail=False, methods=['get'], url_path='lte-metrics',
+            renderer_classes=renderers.TIME_SERIES_RENDERERS)
     def lte_metrics(self, request):
         """
         Get LTE performance metrics from Starburst Enterprise with fallback to mock data.
@@ -168,41 +758,30 @@ class NetworkPerformanceViewSet(viewsets.ModelViewSet):
                 )
             
             # Cache key for this request
-            cache_key = f"lte_metrics:{site}:{start_date.strftime('%Y-%m-%d')}:{end_date.strftime('%Y-%m-%d')}"
-            cached_data = cache.get(cache_key)
-            if cached_data:
-                logger.info(f"Returning cached LTE metrics for site {site}")
-                return Response(cached_data)
-
-            # Try to get real data from Starburst
-            try:
+            date_parts = ('frame', start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+            cache_key = caching.make_key('lte_metrics', *date_parts, site=site)
+            
+            def fetch_results():
                 logger.info(f"Attempting to fetch real LTE data from Starburst for site {site}")
                 
-                # Prepare query parameters
-                params = {
-                    'SITE': site,
-                    'StartDate': start_date.strftime('%Y-%m-%d'),
-                    'EndDate': end_date.strftime('%Y-%m-%d')
-                }
+                # Assembled from per-day fragments, so only days that
+                # aren't cached yet are queried
+                results = fetch_metric_days('LTE', site, start_date, end_date)
                 
-                # Execute query with error handling
-                df = execute_query(LTE_QUERY, params)
-                
-                if not df.empty:
-                    # Process data (handle NaN values and convert to serializable format)
-                    df = df.fillna(0)  # Replace NaN with zeros
-                    
-                    # Convert datetime columns to string if any
-                    for col in df.select_dtypes(include=['datetime']).columns:
-                        df[col] = df[col].dt.strftime('%Y-%m-%d %H:%M:%S')
-                    
-                    # Convert to dictionary records
-                    results = df.to_dict(orient='records')
-                    logger.info("Successfully retrieved real LTE data from Starburst")
-                    
-                    # Cache the results for 5 minutes
-                    cache.set(cache_key, results, timeout=300)
-                    return Response(results)
+                if results.empty:
+                    return None
+                logger.info("Successfully retrieved real LTE data from Starburst")
+                return results
+
+            # Try to get real data from Starburst; concurrent misses for the
+            # same site and window share one query
+            try:
+                results = caching.single_flight(
+                    cache_key, fetch_results, timeout=300,
+                    stale_key=caching.make_stale_key('lte_metrics', *date_parts, site=site)
+                )
+                if results is not None and len(results):
+                    return Response(self._table_response_data(results))
                 else:
                     logger.warning("No real LTE data found, falling back to mock data")
                     use_mock_data = True
@@ -260,7 +839,7 @@ class NetworkPerformanceViewSet(viewsets.ModelViewSet):
 
             logger.info("Using mock LTE data")
             # Cache the mock results for 5 minutes
-            cache.set(cache_key, mock_data, timeout=300)
+            caching.set(cache_key, mock_data, timeout=300)
             return Response(mock_data)
             
         except Exception as e:
@@ -273,7 +852,8 @@ class NetworkPerformanceViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
-    @action(detail=False, methods=['get'], url_path='nr-metrics')
+    @action(detail=False, methods=['get'], url_path='nr-metrics',
+            renderer_classes=renderers.TIME_SERIES_RENDERERS)
     def nr_metrics(self, request):
         """
         Get NR performance metrics from Starburst Enterprise with fallback to mock data.
@@ -318,41 +898,30 @@ class NetworkPerformanceViewSet(viewsets.ModelViewSet):
                 )
             
             # Cache key for this request
-            cache_key = f"nr_metrics:{site}:{start_date.strftime('%Y-%m-%d')}:{end_date.strftime('%Y-%m-%d')}"
-            cached_data = cache.get(cache_key)
-            if cached_data:
-                logger.info(f"Returning cached NR metrics for site {site}")
-                return Response(cached_data)
-
-            # Try to get real data from Starburst
-            try:
+            date_parts = ('frame', start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+            cache_key = caching.make_key('nr_metrics', *date_parts, site=site)
+            
+            def fetch_results():
                 logger.info(f"Attempting to fetch real NR data from Starburst for site {site}")
                 
-                # Prepare query parameters
-                params = {
-                    'SITE': site,
-                    'StartDate': start_date.strftime('%Y-%m-%d'),
-                    'EndDate': end_date.strftime('%Y-%m-%d')
-                }
-                
-                # Execute query with error handling
-                df = execute_query(NR_QUERY, params)
+                # Assembled from per-day fragments, so only days that
+                # aren't cached yet are queried
+                results = fetch_metric_days('NR', site, start_date, end_date)
                 
-                if not df.empty:
-                    # Process data (handle NaN values and convert to serializable format)
-                    df = df.fillna(0)  # Replace NaN with zeros
-                    
-                    # Convert datetime columns to string if any
-                    for col in df.select_dtypes(include=['datetime']).columns:
-                        df[col] = df[col].dt.strftime('%Y-%m-%d %H:%M:%S')
-                    
-                    # Convert to dictionary records
-                    results = df.to_dict(orient='records')
-                    logger.info("Successfully retrieved real NR data from Starburst")
-                    
-                    # Cache the results for 5 minutes
-                    cache.set(cache_key, results, timeout=300)
-                    return Response(results)
+                if results.empty:
+                    return None
+                logger.info("Successfully retrieved real NR data from Starburst")
+                return results
+
+            # Try to get real data from Starburst; concurrent misses for the
+            # same site and window share one query
+            try:
+                results = caching.single_flight(
+                    cache_key, fetch_results, timeout=300,
+                    stale_key=caching.make_stale_key('nr_metrics', *date_parts, site=site)
+                )
+                if results is not None and len(results):
+                    return Response(self._table_response_data(results))
                 else:
                     logger.warning("No real NR data found, falling back to mock data")
                     use_mock_data = True
@@ -398,7 +967,7 @@ class NetworkPerformanceViewSet(viewsets.ModelViewSet):
 
             logger.info("Using mock NR data")
             # Cache the mock results for 5 minutes
-            cache.set(cache_key, mock_data, timeout=300)
+            caching.set(cache_key, mock_data, timeout=300)
             return Response(mock_data)
             
         except Exception as e:
@@ -469,210 +1038,15 @@ class NetworkPerformanceViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Prepare query parameters
-            params = {
-                'SITE': site,
-                'StartDate': start_date.strftime('%Y-%m-%d'),
-                'EndDate': end_date.strftime('%Y-%m-%d')
-            }
-
-            # Cache key for this request
-            cache_key = f"dashboard_summary:{site}:{start_date.strftime('%Y-%m-%d')}:{end_date.strftime('%Y-%m-%d')}"
-            cached_data = cache.get(cache_key)
-            if cached_data:
-                logger.info(f"Returning cached dashboard summary for site {site}")
-                return Response(cached_data)
-
-            summary = {'lte': None, 'nr': None}
-            use_mock_data = False
-
-            # Try to get real data from Starburst
-            try:
-                logger.info(f"Attempting to fetch real data from Starburst for site {site}")
-                
-                # Execute LTE query with error handling
-                lte_df = execute_query(LTE_QUERY, params)
-                if not lte_df.empty:
-                    # Calculate actual days in the dataset
-                    actual_days = (lte_df['metrics_date_local'].max() - lte_df['metrics_date_local'].min()).days + 1
-                    logger.info(f"Found {actual_days} days of LTE data for site {site}")
-                    
-                    summary['lte'] = {
-                        'cell_count': len(lte_df['eutran_cell_id'].unique()),
-                        'avg_availability': float(lte_df['Cell Availability'].mean()),
-                        'avg_dl_throughput': float(lte_df['DL Cell Throughput'].mean()),
-                        'avg_ul_throughput': float(lte_df['UL Cell Throughput'].mean()),
-                        'total_dl_volume': float(lte_df['PDCP Volume DL'].sum()),
-                        'total_ul_volume': float(lte_df['PDCP Volume UL'].sum()),
-                        'avg_latency': float(lte_df['DL Latency'].mean()),
-                        'avg_prb_util_dl': float(lte_df['DL PRB Usage'].mean()),
-                        'avg_prb_util_ul': float(lte_df['UL PRB Usage'].mean()),
-                        'cell_metrics': [],
-                        'actual_days': actual_days  # Include actual days in response
-                    }
-                    
-                    # Get cell-specific metrics
-                    for cell_id in lte_df['eutran_cell_id'].unique():
-                        cell_df = lte_df[lte_df['eutran_cell_id'] == cell_id]
-                        try:
-                            cell_metrics = {
-                                'cell_id': cell_id,
-                                'availability': float(cell_df['Cell Availability'].mean()),
-                                'dl_throughput': float(cell_df['DL Cell Throughput'].mean()),
-                                'ul_throughput': float(cell_df['UL Cell Throughput'].mean()),
-                                'dl_volume': float(cell_df['PDCP Volume DL'].sum()),
-                                'ul_volume': float(cell_df['PDCP Volume UL'].sum()),
-                                'latency': float(cell_df['DL Latency'].mean()),
-                                'prb_util_dl': float(cell_df['DL PRB Usage'].mean()),
-                                'prb_util_ul': float(cell_df['UL PRB Usage'].mean())
-                            }
-                            summary['lte']['cell_metrics'].append(cell_metrics)
-                        except Exception as e:
-                            logger.error(f"Error processing LTE cell metrics for {cell_id}: {str(e)}")
-                            continue
-
-                # Execute NR query with error handling
-                nr_df = execute_query(NR_QUERY, params)
-                if not nr_df.empty:
-                    # Calculate actual days in the dataset
-                    actual_days = (nr_df['metrics_date_local'].max() - nr_df['metrics_date_local'].min()).days + 1
-                    logger.info(f"Found {actual_days} days of NR data for site {site}")
-                    
-                    summary['nr'] = {
-                        'cell_count': len(nr_df['gutran_cell_id'].unique()),
-                        'avg_dl_throughput': float(nr_df['MAC_DL_Thp_Max'].mean()),
-                        'avg_ul_throughput': float(nr_df['MAC_UL_Thp_Max'].mean()),
-                        'total_dl_volume': float(nr_df['DL_Data_Volume'].sum()),
-                        'total_ul_volume': float(nr_df['UL_Data_Volume'].sum()),
-                        'avg_dl_latency': float(nr_df['DL_Latency_Non_DRX_QoS_0'].mean()),
-                        'avg_prb_util_dl': float(nr_df['PRB_Util_DL'].mean()),
-                        'avg_prb_util_ul': float(nr_df['PRB_Util_UL'].mean()),
-                        'cell_metrics': [],
-                        'actual_days': actual_days  # Include actual days in response
-                    }
-                    
-                    # Get cell-specific metrics
-                    for cell_id in nr_df['gutran_cell_id'].unique():
-                        cell_df = nr_df[nr_df['gutran_cell_id'] == cell_id]
-                        try:
-                            cell_metrics = {
-                                'cell_id': cell_id,
-                                'enodeb_name': cell_df['enodeb_name'].iloc[0] if 'enodeb_name' in cell_df else '',
-                                'dl_throughput': float(cell_df['MAC_DL_Thp_Max'].mean()),
-                                'ul_throughput': float(cell_df['MAC_UL_Thp_Max'].mean()),
-                                'dl_volume': float(cell_df['DL_Data_Volume'].sum()),
-                                'ul_volume': float(cell_df['UL_Data_Volume'].sum()),
-                                'dl_latency': float(cell_df['DL_Latency_Non_DRX_QoS_0'].mean()),
-                                'prb_util_dl': float(cell_df['PRB_Util_DL'].mean()),
-                                'prb_util_ul': float(cell_df['PRB_Util_UL'].mean())
-                            }
-                            summary['nr']['cell_metrics'].append(cell_metrics)
-                        except Exception as e:
-                            logger.error(f"Error processing NR cell metrics for {cell_id}: {str(e)}")
-                            continue
-
-                # If both LTE and NR data are None, use mock data
-                if summary['lte'] is None and summary['nr'] is None:
-                    logger.warning("No real data found, falling back to mock data")
-                    use_mock_data = True
-
-            except Exception as e:
-                logger.error(f"Error fetching data from Starburst: {str(e)}")
-                logger.info("Falling back to mock data due to Starburst connection error")
-                use_mock_data = True
-
-            # Use mock data if needed
-            if use_mock_data:
-                summary = {
-                    'lte': {
-                        'cell_count': 3,
-                        'avg_availability': 99.8,
-                        'avg_dl_throughput': 150.5,
-                        'avg_ul_throughput': 45.2,
-                        'total_dl_volume': 1024.5,
-                        'total_ul_volume': 512.3,
-                        'avg_latency': 25.5,
-                        'avg_prb_util_dl': 65.2,
-                        'avg_prb_util_ul': 45.8,
-                        'actual_days': 1,  # Mock data represents 1 day
-                        'cell_metrics': [
-                            {
-                                'cell_id': 'CELL001',
-                                'availability': 99.9,
-                                'dl_throughput': 155.2,
-                                'ul_throughput': 48.5,
-                                'dl_volume': 350.2,
-                                'ul_volume': 175.1,
-                                'latency': 24.8,
-                                'prb_util_dl': 68.5,
-                                'prb_util_ul': 47.2
-                            },
-                            {
-                                'cell_id': 'CELL002',
-                                'availability': 99.7,
-                                'dl_throughput': 148.3,
-                                'ul_throughput': 43.8,
-                                'dl_volume': 325.8,
-                                'ul_volume': 162.9,
-                                'latency': 25.9,
-                                'prb_util_dl': 63.8,
-                                'prb_util_ul': 44.5
-                            },
-                            {
-                                'cell_id': 'CELL003',
-                                'availability': 99.8,
-                                'dl_throughput': 147.9,
-                                'ul_throughput': 43.2,
-                                'dl_volume': 348.5,
-                                'ul_volume': 174.3,
-                                'latency': 25.8,
-                                'prb_util_dl': 63.2,
-                                'prb_util_ul': 45.7
-                            }
-                        ]
-                    },
-                    'nr': {
-                        'cell_count': 2,
-                        'avg_dl_throughput': 850.2,
-                        'avg_ul_throughput': 125.5,
-                        'total_dl_volume': 2048.7,
-                        'total_ul_volume': 1024.4,
-                        'avg_dl_latency': 12.5,
-                        'avg_prb_util_dl': 55.8,
-                        'avg_prb_util_ul': 35.2,
-                        'actual_days': 1,  # Mock data represents 1 day
-                        'cell_metrics': [
-                            {
-                                'cell_id': 'NR001',
-                                'enodeb_name': 'eNB001',
-                                'dl_throughput': 875.5,
-                                'ul_throughput': 128.8,
-                                'dl_volume': 1050.2,
-                                'ul_volume': 525.1,
-                                'dl_latency': 12.2,
-                                'prb_util_dl': 57.2,
-                                'prb_util_ul': 36.5
-                            },
-                            {
-                                'cell_id': 'NR002',
-                                'enodeb_name': 'eNB002',
-                                'dl_throughput': 825.8,
-                                'ul_throughput': 122.2,
-                                'dl_volume': 998.5,
-                                'ul_volume': 499.3,
-                                'dl_latency': 12.8,
-                                'prb_util_dl': 54.5,
-                                'prb_util_ul': 33.9
-                            }
-                        ]
-                    }
-                }
-                logger.info("Using mock data for dashboard summary")
-            else:
-                logger.info("Using real data from Starburst for dashboard summary")
-
-            # Cache the results for 5 minutes
-            cache.set(cache_key, summary, timeout=300)
+            # Concurrent misses for the same site and window share one
+            # summary build; the results are cached for 5 minutes
+            caching.record_access('dashboard_summary', {
+                'site': site,
+                'start_date': start_date.strftime('%Y-%m-%d'),
+                'end_date': end_date.strftime('%Y-%m-%d'),
+            })
+            cache_key, stale_key, build_summary = self._dashboard_summary_entry(site, start_date, end_date)
+            summary = caching.single_flight(cache_key, build_summary, timeout=300, stale_key=stale_key)
             return Response(summary)
             
         except Exception as e:
@@ -685,7 +1059,8 @@ class NetworkPerformanceViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
-    @action(detail=False, methods=['get'], url_path='hierarchical-metrics')
+    @action(detail=False, methods=['get'], url_path='hierarchical-metrics',
+            renderer_classes=renderers.TIME_SERIES_RENDERERS)
     def hierarchical_metrics(self, request):
         """
         Get metrics with hierarchical drill-down support.
@@ -700,15 +1075,17 @@ class NetworkPerformanceViewSet(viewsets.ModelViewSet):
         - start_date: Start date (YYYY-MM-DD)
         - end_date: End date (YYYY-MM-DD)
         - metric: Specific metric to retrieve
+        - cursor: Keyset cursor from links.next (cell level); pass page
+          instead to get numbered pages of the whole window
         """
         try:
             # Get and validate parameters
-            level = request.query_params.get('level', 'network')
-            site = request.query_params.get('site')
-            cell_id = request.query_params.get('cell_id')
+            level = request.query_params.get('level', 'network').strip().lower()
+            site = request.query_params.get('site', '').strip() or None
+            cell_id = request.query_params.get('cell_id', '').strip() or None
             start_date = request.query_params.get('start_date')
             end_date = request.query_params.get('end_date')
-            time_granularity = request.query_params.get('time_granularity', 'day')
+            time_granularity = request.query_params.get('time_granularity', 'day').strip().lower()
             
             # Parameter validation
             if level not in ['network', 'site', 'cell']:
@@ -725,8 +1102,12 @@ class NetworkPerformanceViewSet(viewsets.ModelViewSet):
             
             # Validate dates
             try:
-                start_date = datetime.strptime(start_date, '%Y-%m-%d') if start_date else datetime.now() - timedelta(days=7)
-                end_date = datetime.strptime(end_date, '%Y-%m-%d') if end_date else datetime.now()
+                # Whole days only, so default windows share cache entries
+                # with explicit requests for the same days
+                start_date, end_date = caching.normalize_window(
+                    datetime.strptime(start_date, '%Y-%m-%d') if start_date else None,
+                    datetime.strptime(end_date, '%Y-%m-%d') if end_date else None,
+                )
                 
                 # Limit date range to prevent timeout
                 max_days = 31
@@ -742,81 +1123,44 @@ class NetworkPerformanceViewSet(viewsets.ModelViewSet):
                     'example': '2024-03-13'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Generate cache key
-            cache_key = self._get_cache_key({
+            # Cell-level views are read from Starburst a keyset page at a
+            # time, unless the client asks for a numbered page
+            if level == 'cell' and 'page' not in request.query_params:
+                return self._hierarchical_cell_response(
+                    request, site, cell_id, start_date, end_date, time_granularity
+                )
+            
+            # Try to get from cache, building the response once on a miss
+            cache_params = caching.canonical_params({
                 'level': level,
                 'site': site,
                 'cell_id': cell_id,
-                'start_date': start_date.isoformat(),
-                'end_date': end_date.isoformat(),
+                'start_date': start_date,
+                'end_date': end_date,
                 'time_granularity': time_granularity
             })
-            
-            # Try to get from cache
-            cached_data = cache.get(cache_key)
-            if cached_data:
-                # Apply pagination to cached data
-                paginator = self.pagination_class()
-                page = paginator.paginate_queryset(cached_data['data'], request)
-                if page is not None:
-                    return paginator.get_paginated_response(page)
-                return Response(cached_data)
-            
-            # Prepare query parameters
-            params = {
-                'StartDate': start_date.strftime('%Y-%m-%d'),
-                'EndDate': end_date.strftime('%Y-%m-%d')
-            }
-            if site:
-                params['SITE'] = site
-            if cell_id:
-                params['CELL_ID'] = cell_id
-            
-            # Execute query
-            df = execute_query(LTE_QUERY, params)
-            if df.empty:
+            caching.record_access('hierarchical', cache_params)
+            cache_key, stale_key, build_response = self._hierarchical_entry(**cache_params)
+            response_data = caching.single_flight(
+                cache_key, build_response, timeout=3600,  # Cache for 1 hour
+                stale_key=stale_key
+            )
+            if response_data is None:
                 return Response({
                     'error': 'No data found for the specified parameters',
-                    'parameters': params
+                    'parameters': self._starburst_params(start_date, end_date, site, cell_id)
                 }, status=status.HTTP_404_NOT_FOUND)
             
-            # Process dataframe
-            df = self._process_dataframe(df)
+            # Paginate row positions, so only the rows of the page are
+            # converted for the response
+            data = response_data['data']
+            paginator = CustomPagination()
+            rows = paginator.paginate_queryset(range(len(data)), request)
+            if rows is not None:
+                page = data.iloc[rows[0]:rows[-1] + 1]
+                return paginator.get_paginated_response(self._table_response_data(page))
             
-            # Apply time granularity
-            if time_granularity == 'hour':
-                df['metrics_date_local'] = df['metrics_date_local'].dt.floor('H')
-            else:
-                df['metrics_date_local'] = df['metrics_date_local'].dt.floor('D')
-            
-            # Aggregate based on level
-            result_df = self._aggregate_by_level(df, level)
-            
-            # Convert datetime to string for JSON serialization
-            result_df['metrics_date_local'] = result_df['metrics_date_local'].dt.strftime('%Y-%m-%d %H:%M:%S')
-            
-            # Prepare response data
-            response_data = {
-                'metadata': {
-                    'level': level,
-                    'time_granularity': time_granularity,
-                    'start_date': start_date.strftime('%Y-%m-%d'),
-                    'end_date': end_date.strftime('%Y-%m-%d'),
-                    'total_records': len(result_df)
-                },
-                'data': result_df.to_dict(orient='records')
-            }
-            
-            # Cache the results
-            cache.set(cache_key, response_data, timeout=3600)  # Cache for 1 hour
-            
-            # Apply pagination
-            paginator = self.pagination_class()
-            page = paginator.paginate_queryset(response_data['data'], request)
-            if page is not None:
-                return paginator.get_paginated_response(page)
-            
-            return Response(response_data)
+            return Response({**response_data, 'data': self._table_response_data(data)})
             
         except ValueError as ve:
             return self._handle_error(ve, status.HTTP_400_BAD_REQUEST)
@@ -825,86 +1169,48 @@ class NetworkPerformanceViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'], url_path='alerts')
     def alerts(self, request):
-        """Get network performance alerts based on thresholds"""
+        """
+        Get network performance alerts based on thresholds
+        
+        Alerts are evaluated when metrics are ingested and again after a
+        threshold change (see alerts.AlertScan and tasks.reevaluate_alerts),
+        so this is an indexed read of the Alert table, critical first and newest first. Optional `status` ('open' by
+        default, 'closed' or 'all'), `severity` ('critical' or 'warning') and
+        `site` filters.
+        """
         try:
-            # Get the latest metrics within the last 24 hours
-            time_threshold = datetime.now() - timedelta(hours=24)
-            recent_metrics = NetworkPerformance.objects.filter(
-                metrics_date_local__gte=time_threshold,
-                is_active=True
-            )
-
-            alerts = []
+            severity = request.query_params.get('severity', '').strip().lower() or None
+            if severity and severity not in alert_engine.SEVERITIES:
+                raise ValueError(f"severity must be one of: {', '.join(alert_engine.SEVERITIES)}")
+            alert_status = request.query_params.get('status', 'open').strip().lower()
+            if alert_status not in ('open', 'closed', 'all'):
+                raise ValueError("status must be one of: open, closed, all")
             
-            # Define thresholds for different metrics
-            thresholds = {
-                'cell_availability': {'warning': 98.0, 'critical': 95.0, 'type': 'min'},
-                'dl_cell_throughput': {'warning': 50.0, 'critical': 25.0, 'type': 'min'},
-                'ul_cell_throughput': {'warning': 10.0, 'critical': 5.0, 'type': 'min'},
-                'dl_latency': {'warning': 50.0, 'critical': 100.0, 'type': 'max'},
-                'dl_prb_usage': {'warning': 80.0, 'critical': 90.0, 'type': 'max'},
-                'ul_prb_usage': {'warning': 80.0, 'critical': 90.0, 'type': 'max'}
-            }
-
-            # Check each metric against thresholds
-            for metric in recent_metrics:
-                for field, threshold in thresholds.items():
-                    value = getattr(metric, field)
-                    if value is not None:
-                        alert = None
-                        if threshold['type'] == 'min':
-                            if value < threshold['critical']:
-                                alert = {
-                                    'severity': 'critical',
-                                    'message': f'{field.replace("_", " ").title()} is critically low',
-                                    'value': value,
-                                    'threshold': threshold['critical'],
-                                    'site': metric.site,
-                                    'cell_id': metric.cell_id,
-                                    'timestamp': metric.metrics_date_local
-                                }
-                            elif value < threshold['warning']:
-                                alert = {
-                                    'severity': 'warning',
-                                    'message': f'{field.replace("_", " ").title()} is below warning threshold',
-                                    'value': value,
-                                    'threshold': threshold['warning'],
-                                    'site': metric.site,
-                                    'cell_id': metric.cell_id,
-                                    'timestamp': metric.metrics_date_local
-                                }
-                        else:  # max threshold
-                            if value > threshold['critical']:
-                                alert = {
-                                    'severity': 'critical',
-                                    'message': f'{field.replace("_", " ").title()} is critically high',
-                                    'value': value,
-                                    'threshold': threshold['critical'],
-                                    'site': metric.site,
-                                    'cell_id': metric.cell_id,
-                                    'timestamp': metric.metrics_date_local
-                                }
-                            elif value > threshold['warning']:
-                                alert = {
-                                    'severity': 'warning',
-                                    'message': f'{field.replace("_", " ").title()} is above warning threshold',
-                                    'value': value,
-                                    'threshold': threshold['warning'],
-                                    'site': metric.site,
-                                    'cell_id': metric.cell_id,
-                                    'timestamp': metric.metrics_date_local
-                                }
-                        
-                        if alert:
-                            alerts.append(alert)
-
-            # Sort alerts by severity (critical first) and timestamp
-            alerts.sort(key=lambda x: (0 if x['severity'] == 'critical' else 1, x['timestamp']), reverse=True)
-
+            queryset = Alert.objects.all()
+            if alert_status != 'all':
+                queryset = queryset.filter(status=alert_status)
+            if severity:
+                queryset = queryset.filter(severity=severity)
+            site = request.query_params.get('site')
+            if site:
+                queryset = queryset.filter(site=site)
+            
+            paginator = CustomPagination()
+            page = paginator.paginate_queryset(queryset, request)
             return Response({
-                'count': len(alerts),
-                'alerts': alerts
+                'links': {
+                    'next': paginator.get_next_link(),
+                    'previous': paginator.get_previous_link()
+                },
+                'count': paginator.page.paginator.count,
+                'total_pages': paginator.page.paginator.num_pages,
+                'current_page': paginator.page.number,
+                'alerts': [alert_engine.describe(alert) for alert in page]
             })
 
+        except ValueError as ve:
+            return self._handle_error(ve, status.HTTP_400_BAD_REQUEST)
+        except NotFound as nf:
+            return self._handle_error(nf, status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return self._handle_error(e)
@@ -160,6 +160,35 @@ if DATABASE_URL:
     print(f"Using DATABASE_URL configuration: {DATABASE_URL}")
 
 
+# Cache
+# Shared Redis cache so gunicorn workers and Celery see the same entries.
+# Values are msgpack-serialized and zstd-compressed; cache outages degrade
+# to misses instead of errors.
+NETWORK_PERF_REDIS_URL = config('NETWORK_PERF_REDIS_URL', default='redis://127.0.0.1:6379')
+NETWORK_PERF_REDIS_DB = config('NETWORK_PERF_REDIS_DB', default=1, cast=int)
+NETWORK_PERF_REDIS_PASSWORD = config('NETWORK_PERF_REDIS_PASSWORD', default=None)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': f"{NETWORK_PERF_REDIS_URL.rstrip('/')}/{NETWORK_PERF_REDIS_DB}",
+        'KEY_PREFIX': 'fwpm',
+        # Bumped when the serialized format changes (2: DataFrames no longer pickled)
+        'VERSION': 2,
+        'OPTIONS': {
+            'CLIENT_CLASS': 'fwpm_backend.apps.network_performance.cache_backend.InstrumentedClient',
+            'SERIALIZER': 'fwpm_backend.apps.network_performance.cache_backend.MsgpackSerializer',
+            'COMPRESSOR': 'django_redis.compressors.zstd.ZStdCompressor',
+            'PASSWORD': NETWORK_PERF_REDIS_PASSWORD,
+            'SOCKET_CONNECT_TIMEOUT': 2,
+            'SOCKET_TIMEOUT': 2,
+            'IGNORE_EXCEPTIONS': True,
+        },
+    }
+}
+DJANGO_REDIS_LOG_IGNORED_EXCEPTIONS = True
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 